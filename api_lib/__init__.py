@@ -0,0 +1,48 @@
+"""
+Clients for VK Ads, legacy VK Ads, Telegram, Yandex Messenger and
+Yandex Direct. Names are loaded lazily from their submodules on first
+access, so importing api_lib is cheap.
+"""
+import importlib
+
+_EXPORTS = {
+    "refresh_token_ads_vk": "vk_ads",
+    "get_balance_vk_accs": "vk_ads",
+    "iter_balance_vk_accs": "vk_ads",
+    "get_spent_vk_client": "vk_ads",
+    "VkAdsTokenManager": "vk_ads",
+    "get_spent_vk_frame": "vk_ads",
+    "old_vk_get_stat_campaigns": "vk_legacy",
+    "old_vk_get_stat_campaigns_batch": "vk_legacy",
+    "TelegramBot": "telegram",
+    "TelegramSendQueue": "telegram",
+    "YandexMessengerBot": "yandex_messenger",
+    "UpdateDispatcher": "yandex_messenger",
+    "YandexDirect": "yandex_direct",
+    "AsyncYandexDirect": "async_direct",
+    "ReportScheduler": "report_scheduler",
+    "ReportCache": "report_cache",
+    "RateLimiter": "concurrency",
+    "CampaignCache": "campaign_cache",
+    "CampaignStateStore": "campaign_state",
+    "SQLiteCampaignStateStore": "campaign_state",
+    "JsonCampaignStateStore": "campaign_state",
+    "SpendWarehouse": "spend_warehouse",
+    "UnitsTracker": "units",
+    "create_session": "transport",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,302 @@
+import asyncio
+import json
+import logging
+from time import perf_counter
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .direct_reports import (
+    DEFAULT_OUTSIDE_RF_LOCATION_IDS,
+    OFFLINE_STATUS_MESSAGES,
+    REPORT_ERROR_MESSAGES,
+    adnetwork_report_body,
+    commission_multiplier,
+    filtered_report_body,
+    first_cost_from_tsv,
+    parse_adnetwork_costs_from_tsv,
+    reconcile_row,
+    report_headers,
+    spent_report_body,
+    sum_cost_from_tsv,
+)
+from .instrumentation import NOOP_INSTRUMENTATION, ReportEvent, RequestEvent
+from .report_scheduler import DEFAULT_MAX_QUEUED_PER_LOGIN
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncYandexDirect:
+    def __init__(self, token, session=None, max_concurrency=50,
+                 timeout=300, connection_limit=100, instrumentation=None,
+                 max_queued_per_login=DEFAULT_MAX_QUEUED_PER_LOGIN):
+        """
+        Initializes an asyncio Yandex Direct reports client.
+        Mirrors the report methods of YandexDirect; offline (201/202)
+        reports wait with asyncio.sleep, so many of them can be queued
+        on one event loop.
+
+        Parameters:
+            token (str): The token for Yandex Direct API.
+            session (aiohttp.ClientSession): Optional shared session,
+                created on first request if None.
+            max_concurrency (int): Max HTTP requests in flight. Offline
+                reports do not hold a slot while they wait for retryIn.
+            timeout (float): Total timeout of a single HTTP request, seconds.
+            connection_limit (int): Connection pool size of the own session.
+            instrumentation (Instrumentation): Receives request and report events.
+            max_queued_per_login (int): Reports in flight per advertiser
+                (Client-Login), from the first request until the report
+                is ready or failed.
+
+        Requires aiohttp (pip install api_lib[async]).
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncYandexDirect requires aiohttp: pip install aiohttp")
+        self.token = token
+        self.url_reports = 'https://api.direct.yandex.com/json/v5/reports'
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.instrumentation = instrumentation or NOOP_INSTRUMENTATION
+        self.max_queued_per_login = max(1, max_queued_per_login)
+        self._session = session
+        self._slots_loop = None
+        self._http_slots = None
+        self._login_slots = {}
+        self._own_session = session is None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.connection_limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    def _bind_slots(self):
+        # Семафоры привязаны к циклу событий, для нового цикла создаем заново
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._slots_loop = loop
+            self._http_slots = asyncio.Semaphore(self.max_concurrency)
+            self._login_slots = {}
+
+    def _login_slot(self, login):
+        self._bind_slots()
+        slot = self._login_slots.get(login)
+        if slot is None:
+            slot = self._login_slots[login] = asyncio.Semaphore(self.max_queued_per_login)
+        return slot
+
+    async def close(self):
+        """
+        Closes the HTTP session if it was created by this client
+        """
+        if self._own_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post_report(self, token, login, request_body):
+        """
+        Sends one report request.
+        Returns (status_code, text, headers).
+        """
+        session = self._get_session()
+        self._bind_slots()
+        event = RequestEvent("reports", login)
+        started = perf_counter()
+        try:
+            async with self._http_slots:
+                async with session.post(self.url_reports, data=request_body,
+                                        headers=report_headers(token, login)) as resp:
+                    body = await resp.read()
+                    event.status_code = resp.status
+                    event.request_id = resp.headers.get('RequestId')
+                    event.bytes_received = len(body)
+                    return resp.status, body.decode('utf-8'), resp.headers
+        except Exception as e:
+            event.error = str(e)
+            raise
+        finally:
+            event.latency = perf_counter() - started
+            self.instrumentation.on_request(event)
+
+    async def _request_report_tsv(self, token, login, body, max_network_retries=3):
+        """
+        Executes a Yandex Direct report request and returns TSV text (or empty string).
+        """
+        text = await self._request_report(token, login, body, max_network_retries)
+        return text or ""
+
+    async def _request_report(self, token, login, body, max_network_retries=3):
+        """
+        Returns report TSV text, or None if the API returned an error.
+        Waits while login already has max_queued_per_login reports in flight.
+        """
+        async with self._login_slot(login):
+            return await self._run_report(token, login, body, max_network_retries)
+
+    async def _run_report(self, token, login, body, max_network_retries):
+        requestBody = json.dumps(body, indent=4)
+        report_event = ReportEvent(login, body.get("params", {}).get("ReportName"))
+        started = perf_counter()
+        attempts = 0
+
+        def finish(result):
+            report_event.duration = perf_counter() - started
+            report_event.retries = max(attempts - 1, 0)
+            self.instrumentation.on_report(report_event)
+            return result
+
+        network_attempt = 0
+        while True:
+            attempts += 1
+            try:
+                status, text, headers = await self._post_report(token, login, requestBody)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                network_attempt += 1
+                report_event.status_code = None
+                logger.warning("Произошла ошибка соединения с сервером API для %s: %s", login, e)
+                if network_attempt >= max_network_retries:
+                    return finish(None)
+                await asyncio.sleep(2)
+                continue
+
+            request_id = headers.get('RequestId')
+            report_event.status_code = status
+            report_event.request_id = request_id
+            if status == 200:
+                logger.info("Отчет для аккаунта %s создан успешно, RequestId: %s", login, request_id)
+                return finish(text)
+
+            elif status in (201, 202):
+                retryIn = int(headers.get("retryIn", 60))
+                logger.debug("Отчет для аккаунта %s %s, повторная отправка запроса через %s секунд, "
+                             "RequestId: %s", login, OFFLINE_STATUS_MESSAGES[status], retryIn, request_id)
+                await asyncio.sleep(retryIn)
+                report_event.queue_wait += retryIn
+
+            else:
+                logger.warning("%s (%s), статус %s, RequestId: %s, ответ сервера: %s",
+                               REPORT_ERROR_MESSAGES.get(status, "Произошла непредвиденная ошибка"),
+                               login, status, request_id, text)
+                logger.debug("JSON-код запроса для %s: %s", login, body)
+                return finish(None)
+
+    async def get_single_account_spent(self, token, login, date_range="LAST_3_DAYS"):
+        """
+        Returns spent amount for a single account using individual token
+
+        Returns:
+            dict: {'login': str, 'cost': float} or None if error
+        """
+        tsv_text = await self._request_report(token, login, spent_report_body(date_range))
+        if tsv_text is None:
+            return None
+        try:
+            return {
+                'login': login,
+                'cost': first_cost_from_tsv(tsv_text)
+            }
+        except ValueError as e:
+            logger.warning("Произошла непредвиденная ошибка для %s: %s", login, e)
+            return None
+
+    async def get_single_account_spent_by_adnetwork(self, token, login, date_range="LAST_3_DAYS",
+                                                    report_suffix=None):
+        """
+        Returns spend grouped by AdNetworkType for a single account.
+        """
+        body = adnetwork_report_body(date_range, report_suffix)
+        tsv_text = await self._request_report_tsv(token, login, body)
+        return {
+            'login': login,
+            'costs': parse_adnetwork_costs_from_tsv(tsv_text)
+        }
+
+    async def get_single_account_spent_filtered(self, token, login, date_range="LAST_3_DAYS",
+                                                ad_network_type=None, location_ids=None,
+                                                report_suffix=None):
+        """
+        Returns spent amount for a single account with optional filters:
+        - ad_network_type: "SEARCH" or "AD_NETWORK"
+        - location_ids: list of LocationOfPresenceId
+        """
+        body = filtered_report_body(date_range, ad_network_type, location_ids, report_suffix)
+        tsv_text = await self._request_report_tsv(token, login, body)
+        return {
+            'login': login,
+            'cost': sum_cost_from_tsv(tsv_text)
+        }
+
+    async def _gather_accounts(self, accounts_dict, fetch):
+        """
+        Runs fetch(token, login) for every account at once; HTTP requests
+        are bounded by max_concurrency and max_queued_per_login, offline
+        reports wait without holding a request slot. Results keep the
+        accounts_dict order.
+        """
+        return await asyncio.gather(*(fetch(token, login) for login, token in accounts_dict.items()))
+
+    async def get_multiple_accounts_spent(self, accounts_dict, date_range="LAST_3_DAYS"):
+        """
+        Returns spent amounts for multiple accounts with individual tokens
+        """
+        results = await self._gather_accounts(
+            accounts_dict,
+            lambda token, login: self.get_single_account_spent(token, login, date_range)
+        )
+        return [result for result in results if result]
+
+    async def get_accounts_reconcile_with_commission(self, accounts_dict, date_range="LAST_MONTH",
+                                                     outside_rf_location_ids=None,
+                                                     russia_location_id=225,
+                                                     use_russia_subtract=True,
+                                                     commission_rate=0.03, commission_base=0.97):
+        """
+        Returns reconciliation data per account, same rows as
+        YandexDirect.get_accounts_reconcile_with_commission.
+        Both reports of an account are requested concurrently.
+        """
+        if outside_rf_location_ids is None:
+            outside_rf_location_ids = DEFAULT_OUTSIDE_RF_LOCATION_IDS
+        multiplier = commission_multiplier(commission_rate, commission_base)
+
+        async def reconcile(token, login):
+            if use_russia_subtract:
+                location_ids, suffix = [russia_location_id], f"{login}_ADNET_RU"
+            else:
+                location_ids, suffix = outside_rf_location_ids, f"{login}_ADNET_OUT"
+
+            adnetwork_spend, rsy_spend = await asyncio.gather(
+                self.get_single_account_spent_by_adnetwork(
+                    token=token,
+                    login=login,
+                    date_range=date_range,
+                    report_suffix=f"{login}_ADNET_GROUP"
+                ),
+                self.get_single_account_spent_filtered(
+                    token=token,
+                    login=login,
+                    date_range=date_range,
+                    ad_network_type="AD_NETWORK",
+                    location_ids=location_ids,
+                    report_suffix=suffix
+                )
+            )
+            if use_russia_subtract:
+                return reconcile_row(login, adnetwork_spend['costs'], multiplier,
+                                     rsy_russia_cost=rsy_spend['cost'])
+            return reconcile_row(login, adnetwork_spend['costs'], multiplier,
+                                 rsy_outside_cost=rsy_spend['cost'])
+
+        return list(await self._gather_accounts(accounts_dict, reconcile))
@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from time import time
+
+from .files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_FIELDS = ["Id", "Name", "State", "Status"]
+
+# Максимальный размер страницы в методе get
+CAMPAIGNS_PAGE_LIMIT = 10000
+
+
+class CampaignCache:
+    """
+    Per-login cache of campaign metadata (Id, Name, State, Status) of a
+    YandexDirect client.
+
+    The first use of a login loads all its campaigns; later refreshes ask
+    the Changes service (checkCampaigns) what changed since the last sync
+    and request only those campaigns. Logins are kept in memory in LRU
+    order (at most max_logins); with directory set, each login is also
+    stored in {directory}/{login}.json and survives restarts.
+
+        cache = client.campaign_cache
+        cache.names("client-login", [123, 456])
+    """
+    def __init__(self, client, max_logins=1000, directory=None, max_age=300):
+        """
+        Parameters:
+            client (YandexDirect): Client used for requests.
+            max_logins (int): Logins kept in memory.
+            directory (str): Optional directory for on-disk copies.
+            max_age (float): Seconds after which a lookup refreshes the
+                login incrementally, None to refresh only on refresh().
+        """
+        self.client = client
+        self.max_logins = max_logins
+        self.directory = directory
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._login_locks = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _login_lock(self, login):
+        with self._lock:
+            return self._login_locks.setdefault(login, threading.Lock())
+
+    def _remember(self, login, entry):
+        with self._lock:
+            self._entries[login] = entry
+            self._entries.move_to_end(login)
+            while len(self._entries) > self.max_logins:
+                self._entries.popitem(last=False)
+
+    def _cached(self, login):
+        with self._lock:
+            entry = self._entries.get(login)
+            if entry is not None:
+                self._entries.move_to_end(login)
+                return entry
+        entry = self._load(login)
+        if entry is not None:
+            self._remember(login, entry)
+        return entry
+
+    def _path(self, login):
+        return os.path.join(self.directory, f"{login}.json")
+
+    def _load(self, login):
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(login), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        data["campaigns"] = {int(campaign_id): campaign
+                             for campaign_id, campaign in data["campaigns"].items()}
+        return data
+
+    def _save(self, login, entry):
+        if not self.directory:
+            return
+        with atomic_write(self._path(login)) as f:
+            json.dump(entry, f, ensure_ascii=False)
+
+    def _changes(self, login, method, params):
+        headers = {
+            "Authorization": "Bearer " + self.client.token,
+            "Client-Login": login
+        }
+        response = self.client._post("changes", self.client.url_changes, login, headers=headers,
+                                     json={"method": method, "params": params})
+        data = response.json()
+        if response.status_code != 200 or 'error' in data:
+            raise RuntimeError(f"Ошибка сервиса Changes для {login}: {data}")
+        return data['result']
+
+    def _fetch_all(self, login):
+        headers = {
+            "Authorization": "Bearer " + self.client.token,
+            "Client-Login": login
+        }
+        campaigns = []
+        offset = 0
+        while True:
+            json_data = {
+                "method": "get",
+                "params": {
+                    "SelectionCriteria": {},
+                    "FieldNames": CAMPAIGN_FIELDS,
+                    "Page": {"Limit": CAMPAIGNS_PAGE_LIMIT, "Offset": offset}
+                }
+            }
+            response = self.client._post("campaigns", self.client.url_campaigns, login,
+                                         headers=headers, json=json_data)
+            data = response.json()
+            if response.status_code != 200 or 'error' in data:
+                raise RuntimeError(f"Ошибка получения кампаний для {login}: {data}")
+            campaigns.extend(data['result'].get('Campaigns', []))
+            if 'LimitedBy' not in data['result']:
+                return campaigns
+            offset = data['result']['LimitedBy']
+
+    def _fetch_ids(self, login, ids):
+        data = self.client._campaigns_request(login, "get", ids, "Campaigns",
+                                              {"FieldNames": CAMPAIGN_FIELDS})
+        if data is None or 'error' in data:
+            raise RuntimeError(f"Ошибка получения кампаний для {login}: {data}")
+        return data['result'].get('Campaigns', [])
+
+    def _full_sync(self, login):
+        # Метка берется до выгрузки, чтобы не пропустить изменения во время нее
+        timestamp = self._changes(login, "checkDictionaries", {})['Timestamp']
+        campaigns = self._fetch_all(login)
+        logger.info("Кэш кампаний %s: загружено %s кампаний", login, len(campaigns))
+        return {
+            "timestamp": timestamp,
+            "synced": time(),
+            "campaigns": {campaign['Id']: campaign for campaign in campaigns}
+        }
+
+    def _incremental_sync(self, login, entry):
+        result = self._changes(login, "checkCampaigns", {"Timestamp": entry["timestamp"]})
+        changed = [item['CampaignId'] for item in result.get('Campaigns', [])
+                   if 'SELF' in item.get('ChangesIn', [])]
+        campaigns = dict(entry["campaigns"])
+        if changed:
+            for campaign in self._fetch_ids(login, changed):
+                campaigns[campaign['Id']] = campaign
+        logger.debug("Кэш кампаний %s: обновлено %s кампаний", login, len(changed))
+        return {"timestamp": result['Timestamp'], "synced": time(), "campaigns": campaigns}
+
+    def refresh(self, login, full=False):
+        """
+        Syncs the campaigns of login: incrementally via the Changes
+        service if the login is cached, fully otherwise or if full is True.
+        Returns {campaign_id: campaign}.
+        """
+        return self._refresh(login, full)["campaigns"]
+
+    def _refresh(self, login, full=False):
+        with self._login_lock(login):
+            entry = None if full else self._cached(login)
+            entry = self._full_sync(login) if entry is None else self._incremental_sync(login, entry)
+            self._remember(login, entry)
+            self._save(login, entry)
+            return entry
+
+    def _entry(self, login):
+        entry = self._cached(login)
+        if entry is None or (self.max_age is not None and time() - entry["synced"] > self.max_age):
+            entry = self._refresh(login)
+        return entry
+
+    def campaigns(self, login):
+        """
+        Returns {campaign_id: {'Id', 'Name', 'State', 'Status'}} of login,
+        syncing it if it is not cached or older than max_age
+        """
+        return self._entry(login)["campaigns"]
+
+    def names(self, login, ids):
+        """
+        Returns names of campaigns ids in the same order. Ids missing from
+        the cache are requested once; unknown ids give None and are
+        remembered as unknown until the next refresh of the login.
+        """
+        entry = self._entry(login)
+        campaigns = entry["campaigns"]
+        unknown = set(entry.get("unknown", ()))
+        missing = list(dict.fromkeys(campaign_id for campaign_id in ids
+                                     if campaign_id not in campaigns and campaign_id not in unknown))
+        if missing:
+            with self._login_lock(login):
+                fetched = self._fetch_ids(login, missing)
+                cached = self._cached(login)
+                # Логин мог быть вытеснен из кэша, тогда обновляем только ответ
+                if cached is not None:
+                    entry = cached
+                campaigns = entry["campaigns"]
+                for campaign in fetched:
+                    campaigns[campaign['Id']] = campaign
+                unknown = set(entry.get("unknown", ()))
+                unknown.update(campaign_id for campaign_id in missing
+                               if campaign_id not in campaigns)
+                entry["unknown"] = sorted(unknown)
+                if cached is not None:
+                    self._save(login, entry)
+        return [campaigns[campaign_id]['Name'] if campaign_id in campaigns else None
+                for campaign_id in ids]
+
+    def working(self, login):
+        """
+        Returns campaigns of login with State ON
+        """
+        return [campaign for campaign in self.campaigns(login).values()
+                if campaign.get('State') == "ON"]
+
+    def invalidate(self, login=None):
+        """
+        Drops login (all logins if None) from memory; disk copies stay
+        and are refreshed incrementally on next use
+        """
+        with self._lock:
+            if login is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(login, None)
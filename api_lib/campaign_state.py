@@ -0,0 +1,180 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytz
+
+from .files import atomic_write
+
+
+def _now(timezone="Europe/Moscow"):
+    return datetime.now(pytz.timezone(timezone)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class CampaignStateStore:
+    """
+    Storage of suspended campaign ids, used by YandexDirect.suspend_campaigns
+    and recover_campaigns. Subclass it to keep the state elsewhere.
+    """
+    def save_suspended(self, campaigns_by_login):
+        """
+        Records one suspension batch per login, {login: [campaign_id, ...]}
+        """
+        raise NotImplementedError
+
+    def load_suspended(self, logins):
+        """
+        Returns {login: {'date': str, 'campaign_ids': list}} of campaigns
+        suspended and not recovered yet, for logins that have any
+        """
+        raise NotImplementedError
+
+    def mark_recovered(self, logins):
+        """
+        Marks suspended campaigns of logins as recovered
+        """
+        raise NotImplementedError
+
+
+class JsonCampaignStateStore(CampaignStateStore):
+    """
+    Legacy store: one {login}.json file per login in directory, each
+    suspension replaces the previous one. Files are written atomically.
+    Recovered files are kept, as before.
+    """
+    def __init__(self, directory="."):
+        self.directory = directory
+
+    def _path(self, login):
+        return os.path.join(self.directory, f"{login}.json")
+
+    def save_suspended(self, campaigns_by_login):
+        date = _now()
+        for login, campaign_ids in campaigns_by_login.items():
+            with atomic_write(self._path(login)) as f:
+                json.dump({"date": date, "campaign_ids": list(campaign_ids)}, f,
+                          indent=4, ensure_ascii=False)
+
+    def load_suspended(self, logins):
+        result = {}
+        for login in logins:
+            try:
+                with open(self._path(login), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            result[login] = {"date": data.get("date"), "campaign_ids": data["campaign_ids"]}
+        return result
+
+    def mark_recovered(self, logins):
+        pass
+
+
+class SQLiteCampaignStateStore(CampaignStateStore):
+    """
+    SQLite store of suspension batches (login, campaign ids, time).
+
+    Every suspension is kept as a batch; a login is recovered with all of
+    its batches that were not recovered yet. Writes of many logins go in
+    one transaction, lookups for many logins are one indexed query.
+
+    With legacy_directory set, logins missing in the database are looked up
+    in {login}.json files written by earlier versions; such a file is
+    renamed to {login}.json.recovered after recovery.
+    """
+    def __init__(self, path="campaign_state.sqlite3", legacy_directory=None, timeout=30):
+        """
+        Parameters:
+            path (str): Database file, created if missing.
+            legacy_directory (str): Directory with legacy {login}.json files.
+            timeout (float): Seconds to wait for a lock held by another writer.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.legacy = JsonCampaignStateStore(legacy_directory) if legacy_directory else None
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS suspensions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    login TEXT NOT NULL,
+                    suspended_at TEXT NOT NULL,
+                    recovered_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS suspensions_login_active
+                    ON suspensions (login, recovered_at);
+                CREATE TABLE IF NOT EXISTS suspended_campaigns (
+                    suspension_id INTEGER NOT NULL REFERENCES suspensions (id),
+                    campaign_id INTEGER NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS suspended_campaigns_suspension
+                    ON suspended_campaigns (suspension_id);
+            """)
+
+    def _connect(self):
+        # Одно соединение на поток: sqlite3 не разрешает делить их между потоками
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _with_logins(self, conn, logins):
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS query_logins (login TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM query_logins")
+        conn.executemany("INSERT OR IGNORE INTO query_logins VALUES (?)",
+                         ((login,) for login in logins))
+
+    def save_suspended(self, campaigns_by_login):
+        date = _now()
+        with self._connect() as conn:
+            for login, campaign_ids in campaigns_by_login.items():
+                suspension_id = conn.execute(
+                    "INSERT INTO suspensions (login, suspended_at) VALUES (?, ?)",
+                    (login, date)).lastrowid
+                conn.executemany(
+                    "INSERT INTO suspended_campaigns (suspension_id, campaign_id) VALUES (?, ?)",
+                    ((suspension_id, int(campaign_id)) for campaign_id in campaign_ids))
+
+    def load_suspended(self, logins):
+        logins = list(logins)
+        result = {}
+        seen = set()
+        with self._connect() as conn:
+            self._with_logins(conn, logins)
+            rows = conn.execute("""
+                SELECT s.login, s.suspended_at, c.campaign_id
+                FROM query_logins q
+                JOIN suspensions s ON s.login = q.login AND s.recovered_at IS NULL
+                JOIN suspended_campaigns c ON c.suspension_id = s.id
+                ORDER BY s.login, s.id, c.rowid
+            """).fetchall()
+        for login, suspended_at, campaign_id in rows:
+            state = result.setdefault(login, {"date": suspended_at, "campaign_ids": []})
+            state["date"] = suspended_at
+            if (login, campaign_id) not in seen:
+                seen.add((login, campaign_id))
+                state["campaign_ids"].append(campaign_id)
+
+        if self.legacy is not None:
+            missing = [login for login in logins if login not in result]
+            result.update(self.legacy.load_suspended(missing))
+        return result
+
+    def mark_recovered(self, logins):
+        with self._connect() as conn:
+            self._with_logins(conn, logins)
+            conn.execute("""
+                UPDATE suspensions SET recovered_at = ?
+                WHERE recovered_at IS NULL
+                  AND login IN (SELECT login FROM query_logins)
+            """, (_now(),))
+        if self.legacy is not None:
+            # Старый файл восстановлен один раз, повторно его не используем
+            for login in logins:
+                path = self.legacy._path(login)
+                if os.path.exists(path):
+                    os.replace(path, path + ".recovered")
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter, one bucket per key.
+
+    Parameters:
+        rate (float): Allowed calls per second for each key.
+        burst (int): Bucket capacity, i.e. how many calls may go at once
+            after the key has been idle.
+    """
+    def __init__(self, rate=2.0, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _reserve(self, key):
+        """
+        Takes one token for key and returns seconds to wait before using it
+        """
+        with self._lock:
+            now = monotonic()
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if tokens >= 0:
+                return 0.0
+            return -tokens / self.rate
+
+    def acquire(self, key=None):
+        """
+        Blocks until a call for key is allowed
+        """
+        if self.rate <= 0:
+            return
+        delay = self._reserve(key)
+        if delay > 0:
+            sleep(delay)
+
+
+def map_concurrently(func, items, max_workers=4):
+    """
+    Calls func(item) for every item on a bounded thread pool.
+
+    Returns:
+        list: Results in the order of items. An exception raised by func
+            for an item is stored in place of its result.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as pool:
+        return list(pool.map(call, items))
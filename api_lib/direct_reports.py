@@ -0,0 +1,465 @@
+"""
+Yandex Direct Reports API helpers shared by the sync and async clients:
+request headers, report bodies, TSV parsers and reconciliation math.
+"""
+import io
+
+DEFAULT_OUTSIDE_RF_LOCATION_IDS = [166, 111, 183, 241, 10002, 10003, 138]
+
+OFFLINE_STATUS_MESSAGES = {
+    201: "успешно поставлен в очередь в режиме offline",
+    202: "формируется в режиме офлайн",
+}
+
+REPORT_ERROR_MESSAGES = {
+    400: "Параметры запроса указаны неверно или достигнут лимит отчетов в очереди",
+    500: "При формировании отчета произошла ошибка, попробуйте повторить запрос позднее",
+    502: "Время формирования отчета превысило серверное ограничение, "
+         "уменьшите период и количество запрашиваемых данных",
+}
+
+
+def report_headers(token, login=None):
+    """
+    Returns HTTP headers for a TSV report request without report/column
+    headers and summary. Client-Login is set only if login is given.
+    """
+    headers = {
+        "Authorization": "Bearer " + token,
+        "Accept-Language": "ru",
+        'skipReportHeader': "true",
+        'skipColumnHeader': "true",
+        'skipReportSummary': "true",
+        'returnMoneyInMicros': "false"
+    }
+    if login:
+        headers['Client-Login'] = login
+    return headers
+
+
+def spent_report_body(date_range="LAST_3_DAYS"):
+    """
+    Returns ACCOUNT_PERFORMANCE_REPORT body with the Cost column only
+    """
+    return {
+        "params": {
+            "SelectionCriteria": {},
+            "FieldNames": ["Cost"],
+            "ReportName": "ACCOUNT_PERFORMANCE",
+            "ReportType": "ACCOUNT_PERFORMANCE_REPORT",
+            "DateRangeType": date_range,
+            "Format": "TSV",
+            "IncludeVAT": "YES",
+            "IncludeDiscount": "NO"
+        }
+    }
+
+
+def daily_spent_report_body(date_from, date_to):
+    """
+    Returns ACCOUNT_PERFORMANCE_REPORT body with Date and Cost for
+    a CUSTOM_DATE range (dates as "YYYY-MM-DD")
+    """
+    return {
+        "params": {
+            "SelectionCriteria": {
+                "DateFrom": date_from,
+                "DateTo": date_to
+            },
+            "FieldNames": ["Date", "Cost"],
+            "ReportName": f"DAILY_SPENT_{date_from}_{date_to}",
+            "ReportType": "ACCOUNT_PERFORMANCE_REPORT",
+            "DateRangeType": "CUSTOM_DATE",
+            "Format": "TSV",
+            "IncludeVAT": "YES",
+            "IncludeDiscount": "NO"
+        }
+    }
+
+
+def adnetwork_report_body(date_range="LAST_3_DAYS", report_suffix=None):
+    """
+    Returns CUSTOM_REPORT body with AdNetworkType and Cost columns
+    """
+    report_name = "ADNETWORK_SPEND"
+    if report_suffix:
+        report_name = f"{report_name}_{report_suffix}"
+
+    return {
+        "params": {
+            "SelectionCriteria": {},
+            "FieldNames": ["AdNetworkType", "Cost"],
+            "ReportName": report_name,
+            "ReportType": "CUSTOM_REPORT",
+            "DateRangeType": date_range,
+            "Format": "TSV",
+            "IncludeVAT": "YES",
+            "IncludeDiscount": "NO"
+        }
+    }
+
+
+def filtered_report_body(date_range="LAST_3_DAYS", ad_network_type=None,
+                         location_ids=None, report_suffix=None):
+    """
+    Returns CUSTOM_REPORT body with the Cost column and optional filters:
+    - ad_network_type: "SEARCH" or "AD_NETWORK"
+    - location_ids: list of LocationOfPresenceId
+    """
+    filters = []
+    if ad_network_type:
+        filters.append({
+            "Field": "AdNetworkType",
+            "Operator": "EQUALS",
+            "Values": [ad_network_type]
+        })
+    if location_ids:
+        operator = "EQUALS"
+        if len(location_ids) > 1:
+            operator = "IN"
+        filters.append({
+            "Field": "LocationOfPresenceId",
+            "Operator": operator,
+            "Values": [str(x) for x in location_ids]
+        })
+
+    selection_criteria = {}
+    if filters:
+        selection_criteria["Filter"] = filters
+
+    report_name = "FILTERED_SPEND"
+    if report_suffix:
+        report_name = f"{report_name}_{report_suffix}"
+
+    return {
+        "params": {
+            "SelectionCriteria": selection_criteria,
+            "FieldNames": ["Cost"],
+            "ReportName": report_name,
+            "ReportType": "CUSTOM_REPORT",
+            "DateRangeType": date_range,
+            "Format": "TSV",
+            "IncludeVAT": "YES",
+            "IncludeDiscount": "NO"
+        }
+    }
+
+
+def adnetwork_location_report_body(date_range="LAST_3_DAYS", report_suffix=None):
+    """
+    Returns CUSTOM_REPORT body with AdNetworkType, LocationOfPresenceId and Cost columns
+    """
+    report_name = "ADNETWORK_LOCATION_SPEND"
+    if report_suffix:
+        report_name = f"{report_name}_{report_suffix}"
+
+    return {
+        "params": {
+            "SelectionCriteria": {},
+            "FieldNames": ["AdNetworkType", "LocationOfPresenceId", "Cost"],
+            "ReportName": report_name,
+            "ReportType": "CUSTOM_REPORT",
+            "DateRangeType": date_range,
+            "Format": "TSV",
+            "IncludeVAT": "YES",
+            "IncludeDiscount": "NO"
+        }
+    }
+
+
+def first_cost_from_tsv(tsv_text):
+    """
+    Returns the first value of an ACCOUNT_PERFORMANCE report body (0.0 if empty)
+    """
+    if tsv_text == "":
+        return 0.0
+    return float(tsv_text.split('\t')[0])
+
+
+def iter_tsv_lines(tsv):
+    """
+    Iterates over lines of a TSV report given as text or as an iterable
+    of lines (e.g. a streamed response). Text is not split into a list.
+    """
+    if isinstance(tsv, str):
+        tsv = io.StringIO(tsv)
+    for line in tsv:
+        line = line.rstrip('\r\n')
+        if line:
+            yield line
+
+
+def sum_cost_from_tsv(tsv_text):
+    """
+    Sums the Cost column from a TSV report body (first column).
+    tsv_text can also be an iterable of lines.
+    """
+    if not tsv_text:
+        return 0.0
+
+    total = 0.0
+    for line in iter_tsv_lines(tsv_text):
+        value = line.split('\t', 1)[0].strip()
+        if value in ("", "-"):
+            continue
+        try:
+            total += float(value)
+        except ValueError:
+            continue
+    return total
+
+
+def parse_adnetwork_costs_from_tsv(tsv_text):
+    """
+    Parses TSV with columns: AdNetworkType, Cost.
+    Returns dict with summed costs per AdNetworkType.
+    tsv_text can also be an iterable of lines.
+    """
+    costs = {}
+    if not tsv_text:
+        return costs
+
+    for line in iter_tsv_lines(tsv_text):
+        parts = line.split('\t')
+        if len(parts) < 2:
+            continue
+        ad_network_type = parts[0].strip()
+        value = parts[1].strip()
+        if value in ("", "-"):
+            continue
+        try:
+            costs[ad_network_type] = costs.get(ad_network_type, 0.0) + float(value)
+        except ValueError:
+            continue
+    return costs
+
+
+def parse_adnetwork_location_costs_from_tsv(tsv_text):
+    """
+    Parses TSV with columns: AdNetworkType, LocationOfPresenceId, Cost.
+    Returns dict {(AdNetworkType, LocationOfPresenceId): cost}, location is
+    None if it is not a number.
+    """
+    costs = {}
+    if not tsv_text:
+        return costs
+
+    for line in iter_tsv_lines(tsv_text):
+        parts = line.split('\t')
+        if len(parts) < 3:
+            continue
+        value = parts[2].strip()
+        if value in ("", "-"):
+            continue
+        try:
+            cost = float(value)
+        except ValueError:
+            continue
+        try:
+            location_id = int(parts[1])
+        except ValueError:
+            location_id = None
+        key = (parts[0].strip(), location_id)
+        costs[key] = costs.get(key, 0.0) + cost
+    return costs
+
+
+def region_within(region_id, ancestor_ids, parents):
+    """
+    Checks whether a region is one of ancestor_ids or lies inside one of them.
+    parents - {GeoRegionId: ParentId} from the GeoRegions dictionary.
+    """
+    seen = set()
+    while region_id is not None and region_id not in seen:
+        if region_id in ancestor_ids:
+            return True
+        seen.add(region_id)
+        region_id = parents.get(region_id)
+    return False
+
+
+def reconcile_row_from_locations(login, location_costs, parents, multiplier,
+                                 russia_location_id=225, outside_rf_location_ids=None,
+                                 use_russia_subtract=True):
+    """
+    Builds a reconciliation row from AdNetworkType x LocationOfPresenceId
+    costs, splitting RSYA spend by region locally instead of with an
+    extra filtered report.
+    """
+    adnetwork_costs = {}
+    rsy_selected_cost = 0.0
+    if use_russia_subtract:
+        selected_ids = {russia_location_id}
+    else:
+        selected_ids = set(outside_rf_location_ids or DEFAULT_OUTSIDE_RF_LOCATION_IDS)
+
+    for (ad_network_type, location_id), cost in location_costs.items():
+        adnetwork_costs[ad_network_type] = adnetwork_costs.get(ad_network_type, 0.0) + cost
+        if ad_network_type == "AD_NETWORK" and region_within(location_id, selected_ids, parents):
+            rsy_selected_cost += cost
+
+    if use_russia_subtract:
+        return reconcile_row(login, adnetwork_costs, multiplier, rsy_russia_cost=rsy_selected_cost)
+    return reconcile_row(login, adnetwork_costs, multiplier, rsy_outside_cost=rsy_selected_cost)
+
+
+class _LinesReader(io.TextIOBase):
+    """
+    Read-only text file over an iterable of lines, so that a streamed
+    report can be passed to pandas.read_csv without joining it.
+    """
+    def __init__(self, lines):
+        self._lines = iter(lines)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line + "\n"
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+# Типы числовых полей отчетов; остальные поля читаются как строки
+REPORT_FIELD_DTYPES = {
+    "Cost": "float64",
+    "AvgCpc": "float64",
+    "AvgCpm": "float64",
+    "Ctr": "float64",
+    "Revenue": "float64",
+    "Clicks": "Int64",
+    "Impressions": "Int64",
+    "Conversions": "Int64",
+    "CampaignId": "Int64",
+    "AdGroupId": "Int64",
+    "AdId": "Int64",
+    "LocationOfPresenceId": "Int64",
+    "TargetingLocationId": "Int64",
+}
+
+
+def report_to_dataframe(tsv, field_names, dtypes=None):
+    """
+    Parses a TSV report body into a typed DataFrame with the C engine.
+
+    Parameters:
+        tsv (str or iterable): Report text or iterable of lines
+            (skipColumnHeader=true, as returned by _request_report_tsv).
+        field_names (list): FieldNames of the report, in order.
+        dtypes (dict): Column dtypes overriding REPORT_FIELD_DTYPES.
+
+    "-" and values that are not numbers become NA in numeric columns,
+    rows with extra fields are skipped.
+    """
+    import pandas as pd
+
+    columns = list(field_names)
+    if not tsv:
+        return pd.DataFrame({name: pd.Series(dtype="object") for name in columns})
+
+    declared = dict(REPORT_FIELD_DTYPES)
+    declared.update(dtypes or {})
+    numeric = {name: declared[name] for name in columns if name in declared}
+
+    source = io.StringIO(tsv) if isinstance(tsv, str) else _LinesReader(tsv)
+    df = pd.read_csv(
+        source,
+        sep="\t",
+        header=None,
+        names=columns,
+        dtype={name: "string" for name in columns if name not in numeric},
+        na_values=["-"],
+        keep_default_na=False,
+        skip_blank_lines=True,
+        quoting=3,  # csv.QUOTE_NONE
+        on_bad_lines="skip",
+        engine="c",
+    )
+    for name, dtype in numeric.items():
+        if not pd.api.types.is_numeric_dtype(df[name]):
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+        df[name] = df[name].astype(dtype)
+    return df
+
+
+def sum_cost_frame(df, column="Cost"):
+    """
+    Vectorized sum of a cost column, NA values are skipped.
+    """
+    if df.empty:
+        return 0.0
+    return float(df[column].sum())
+
+
+def group_cost_frame(df, by, column="Cost"):
+    """
+    Vectorized sum of a cost column grouped by another column.
+    Returns dict {group value: cost}.
+    """
+    if df.empty:
+        return {}
+    grouped = df.dropna(subset=[column]).groupby(by, sort=False)[column].sum()
+    return {key: float(value) for key, value in grouped.items()}
+
+
+def group_location_cost_frame(df, column="Cost"):
+    """
+    Vectorized parse_adnetwork_location_costs_from_tsv: sums a cost column
+    of an AdNetworkType x LocationOfPresenceId report. Returns dict
+    {(AdNetworkType, LocationOfPresenceId): cost}, location is None if it
+    is not a number.
+    """
+    import pandas as pd
+
+    if df.empty:
+        return {}
+    grouped = (df.dropna(subset=[column])
+               .groupby(["AdNetworkType", "LocationOfPresenceId"], sort=False, dropna=False)
+               [column].sum())
+    return {(network, None if pd.isna(location) else int(location)): float(value)
+            for (network, location), value in grouped.items()}
+
+
+def commission_multiplier(commission_rate=0.03, commission_base=0.97):
+    return 1 + (commission_rate / commission_base)
+
+
+def reconcile_row(login, adnetwork_costs, multiplier, rsy_russia_cost=None,
+                  rsy_outside_cost=None):
+    """
+    Builds a reconciliation row from AdNetworkType costs and either the
+    RSYA spend in Russia or the RSYA spend outside RF (the other one is
+    derived from the RSYA total).
+    """
+    search_cost = adnetwork_costs.get("SEARCH", 0.0)
+    rsy_total_cost = adnetwork_costs.get("AD_NETWORK", 0.0)
+    total_cost = search_cost + rsy_total_cost
+
+    if rsy_outside_cost is None:
+        rsy_russia_cost = rsy_russia_cost or 0.0
+        rsy_outside_cost = max(rsy_total_cost - rsy_russia_cost, 0.0)
+    else:
+        rsy_russia_cost = max(rsy_total_cost - rsy_outside_cost, 0.0)
+
+    excluded_sum = search_cost + rsy_outside_cost
+    commission_base_sum = total_cost - excluded_sum
+    commission_sum = commission_base_sum * multiplier
+
+    return {
+        "login": login,
+        "total_spend": total_cost,
+        "search_spend": search_cost,
+        "rsy_total_spend": rsy_total_cost,
+        "rsy_russia_spend": rsy_russia_cost,
+        "rsy_outside_rf_spend": rsy_outside_cost,
+        "excluded_sum": excluded_sum,
+        "commission_base_sum": commission_base_sum,
+        "commission_sum": commission_sum
+    }
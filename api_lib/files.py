@@ -0,0 +1,27 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode="w", encoding="utf-8"):
+    """
+    Opens a temporary file next to path and moves it over path when the
+    block exits without an error, so readers never see a partially written
+    file. On error the temporary file is removed and path is left as is.
+
+    Parameters:
+        path (str): File to write.
+        mode (str): "w" for text (with encoding) or "wb" for bytes.
+        encoding (str): Encoding of text files.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
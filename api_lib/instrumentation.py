@@ -0,0 +1,245 @@
+import threading
+from time import perf_counter
+
+
+class RequestEvent:
+    """
+    One HTTP request made by a client.
+
+    Attributes:
+        endpoint (str): Service name, e.g. "reports", "campaigns".
+        login (str): Client-Login of the request, or None.
+        status_code (int): HTTP status, None if the request failed.
+        latency (float): Seconds from sending to receiving the headers.
+        bytes_received (int): Size of the response body (Content-Length
+            for streamed responses).
+        request_id (str): RequestId response header.
+        error (str): Exception text if the request failed.
+    """
+    __slots__ = ("endpoint", "login", "status_code", "latency",
+                 "bytes_received", "request_id", "error")
+
+    def __init__(self, endpoint, login=None, status_code=None, latency=0.0,
+                 bytes_received=0, request_id=None, error=None):
+        self.endpoint = endpoint
+        self.login = login
+        self.status_code = status_code
+        self.latency = latency
+        self.bytes_received = bytes_received
+        self.request_id = request_id
+        self.error = error
+
+
+class ReportEvent:
+    """
+    One finished report, possibly after several requests.
+
+    Attributes:
+        login (str): Client-Login of the report.
+        report_name (str): ReportName of the request body.
+        status_code (int): Status of the last response, None on network failure.
+        duration (float): Seconds from the first request to the result.
+        queue_wait (float): Seconds spent waiting on 201/202 (retryIn).
+        retries (int): Requests sent after the first one.
+        request_id (str): RequestId of the last response.
+        cached (bool): The report came from the report cache.
+    """
+    __slots__ = ("login", "report_name", "status_code", "duration", "queue_wait",
+                 "retries", "request_id", "cached")
+
+    def __init__(self, login, report_name=None, status_code=None, duration=0.0,
+                 queue_wait=0.0, retries=0, request_id=None, cached=False):
+        self.login = login
+        self.report_name = report_name
+        self.status_code = status_code
+        self.duration = duration
+        self.queue_wait = queue_wait
+        self.retries = retries
+        self.request_id = request_id
+        self.cached = cached
+
+
+class Instrumentation:
+    """
+    Base instrumentation, does nothing. Subclass and override the hooks.
+    Hooks are called from worker threads and must be thread-safe.
+    """
+    def on_request(self, event):
+        """
+        Called after every HTTP request with a RequestEvent
+        """
+
+    def on_report(self, event):
+        """
+        Called when a report is finished with a ReportEvent
+        """
+
+
+NOOP_INSTRUMENTATION = Instrumentation()
+
+
+class CallbackInstrumentation(Instrumentation):
+    """
+    Calls plain functions for the hooks, e.g.
+    CallbackInstrumentation(on_request=lambda event: print(event.latency))
+    """
+    def __init__(self, on_request=None, on_report=None):
+        self._on_request = on_request
+        self._on_report = on_report
+
+    def on_request(self, event):
+        if self._on_request is not None:
+            self._on_request(event)
+
+    def on_report(self, event):
+        if self._on_report is not None:
+            self._on_report(event)
+
+
+class RequestTimer:
+    """
+    Measures one request and sends a RequestEvent to instrumentation.
+
+        with RequestTimer(instrumentation, "reports", login) as timer:
+            response = session.post(...)
+            timer.response = response
+    """
+    def __init__(self, instrumentation, endpoint, login=None, stream=False):
+        self.instrumentation = instrumentation
+        self.event = RequestEvent(endpoint, login)
+        self.stream = stream
+        self.response = None
+
+    def __enter__(self):
+        self._start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event = self.event
+        event.latency = perf_counter() - self._start
+        if exc is not None:
+            event.error = str(exc)
+        response = self.response
+        if response is not None:
+            event.status_code = response.status_code
+            event.request_id = response.headers.get("RequestId")
+            if self.stream:
+                # Тело еще не прочитано, берем размер из заголовка
+                event.bytes_received = int(response.headers.get("Content-Length", 0) or 0)
+            else:
+                event.bytes_received = len(response.content or b"")
+        self.instrumentation.on_request(event)
+        return False
+
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DEFAULT_QUEUE_WAIT_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+def _labels(**labels):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class PrometheusAggregator(Instrumentation):
+    """
+    In-process aggregation of request and report metrics.
+    render() returns them in Prometheus text exposition format.
+
+    Metrics:
+        api_lib_requests_total{endpoint,status}
+        api_lib_request_errors_total{endpoint}
+        api_lib_received_bytes_total{endpoint}
+        api_lib_request_latency_seconds{endpoint} (histogram)
+        api_lib_reports_total{status}
+        api_lib_report_retries_total
+        api_lib_report_queue_wait_seconds (histogram)
+    """
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS,
+                 queue_wait_buckets=DEFAULT_QUEUE_WAIT_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.queue_wait_buckets = queue_wait_buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.errors = {}
+            self.received_bytes = {}
+            self.latency = {}
+            self.reports = {}
+            self.report_retries = 0
+            self.queue_wait = _Histogram(self.queue_wait_buckets)
+
+    def on_request(self, event):
+        with self._lock:
+            if event.status_code is None:
+                self.errors[event.endpoint] = self.errors.get(event.endpoint, 0) + 1
+            else:
+                key = (event.endpoint, event.status_code)
+                self.requests[key] = self.requests.get(key, 0) + 1
+            self.received_bytes[event.endpoint] = (
+                self.received_bytes.get(event.endpoint, 0) + event.bytes_received)
+            histogram = self.latency.get(event.endpoint)
+            if histogram is None:
+                histogram = self.latency[event.endpoint] = _Histogram(self.latency_buckets)
+            histogram.observe(event.latency)
+
+    def on_report(self, event):
+        with self._lock:
+            status = "cached" if event.cached else event.status_code
+            self.reports[status] = self.reports.get(status, 0) + 1
+            self.report_retries += event.retries
+            if not event.cached:
+                self.queue_wait.observe(event.queue_wait)
+
+    @staticmethod
+    def _render_histogram(lines, name, histogram, **labels):
+        # counts уже накопительные: observe() увеличивает все подходящие корзины
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(**labels) if labels else ''} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(**labels) if labels else ''} {histogram.count}")
+
+    def render(self):
+        """
+        Returns metrics in Prometheus text format
+        """
+        with self._lock:
+            lines = ["# TYPE api_lib_requests_total counter"]
+            for (endpoint, status), value in sorted(self.requests.items()):
+                lines.append(f"api_lib_requests_total{_labels(endpoint=endpoint, status=status)} {value}")
+            lines.append("# TYPE api_lib_request_errors_total counter")
+            for endpoint, value in sorted(self.errors.items()):
+                lines.append(f"api_lib_request_errors_total{_labels(endpoint=endpoint)} {value}")
+            lines.append("# TYPE api_lib_received_bytes_total counter")
+            for endpoint, value in sorted(self.received_bytes.items()):
+                lines.append(f"api_lib_received_bytes_total{_labels(endpoint=endpoint)} {value}")
+            lines.append("# TYPE api_lib_request_latency_seconds histogram")
+            for endpoint, histogram in sorted(self.latency.items()):
+                self._render_histogram(lines, "api_lib_request_latency_seconds", histogram,
+                                       endpoint=endpoint)
+            lines.append("# TYPE api_lib_reports_total counter")
+            for status, value in sorted(self.reports.items(), key=lambda item: str(item[0])):
+                lines.append(f"api_lib_reports_total{_labels(status=status)} {value}")
+            lines.append("# TYPE api_lib_report_retries_total counter")
+            lines.append(f"api_lib_report_retries_total {self.report_retries}")
+            lines.append("# TYPE api_lib_report_queue_wait_seconds histogram")
+            self._render_histogram(lines, "api_lib_report_queue_wait_seconds", self.queue_wait)
+            return "\n".join(lines) + "\n"
@@ -0,0 +1,251 @@
+import csv
+import io
+import mimetypes
+import os
+import re
+import uuid
+import zipfile
+import zlib
+
+CHUNK_SIZE = 64 * 1024
+
+# Одна строка с разделителем каталогов или расширением файла в конце
+_PATH_LIKE = re.compile(r"[^\r\n]*(?:[\\/][^\r\n]*|\.[A-Za-z][A-Za-z0-9]{0,4})")
+
+
+def is_path(source):
+    """
+    Returns True if source names a file: os.PathLike, or a str naming an
+    existing file. A one-line str that looks like a path (has a directory
+    separator or ends with a file extension) but does not exist raises
+    FileNotFoundError, so a mistyped path is not sent as file contents.
+    """
+    if isinstance(source, os.PathLike):
+        return True
+    if not isinstance(source, str):
+        return False
+    if os.path.isfile(source):
+        return True
+    if len(source) < 4096 and _PATH_LIKE.fullmatch(source):
+        raise FileNotFoundError(f"File not found: {source}")
+    return False
+
+
+def source_filename(source, default):
+    """
+    Returns the base name of a path source, default for other sources
+    """
+    if is_path(source):
+        return os.path.basename(os.fspath(source))
+    return default
+
+
+def iter_file_chunks(source, chunk_size=CHUNK_SIZE):
+    """
+    Yields bytes chunks of source without reading it whole.
+
+    source may be bytes, a path (os.PathLike or str naming an existing
+    file), an open file object (binary or text) or an iterable of
+    bytes/str chunks. Other str values are treated as file contents,
+    except ones that look like a missing path (see is_path).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield bytes(source)
+        return
+    if is_path(source):
+        with open(source, "rb") as f:
+            yield from iter_file_chunks(f, chunk_size)
+        return
+    if isinstance(source, str):
+        yield source.encode("utf-8")
+        return
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+    for chunk in source:
+        if chunk:
+            yield chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+def source_size(source):
+    """
+    Returns size of source in bytes if known without reading it, else None
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source)
+    if is_path(source):
+        return os.path.getsize(source)
+    return None
+
+
+def gzip_chunks(chunks, level=6):
+    """
+    Compresses a stream of bytes chunks into gzip format on the fly
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only stream collecting written bytes until they are taken
+    """
+    def __init__(self):
+        self._parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def zip_chunks(chunks, arcname, level=6):
+    """
+    Packs a stream of bytes chunks as one file arcname of a zip archive on the fly
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+        with archive.open(arcname, "w", force_zip64=True) as entry:
+            for chunk in chunks:
+                entry.write(chunk)
+                data = sink.take()
+                if data:
+                    yield data
+    yield sink.take()
+
+
+def dataframe_csv_chunks(df, chunk_rows=50000, **to_csv_kwargs):
+    """
+    Yields CSV text of a DataFrame in slices of chunk_rows rows,
+    so the whole CSV is never held in memory. to_csv_kwargs go to
+    DataFrame.to_csv (index=False by default).
+    """
+    to_csv_kwargs.setdefault("index", False)
+    header = to_csv_kwargs.pop("header", True)
+    if len(df) == 0:
+        yield df.to_csv(header=header, **to_csv_kwargs)
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(header=header if start == 0 else False,
+                                                       **to_csv_kwargs)
+
+
+def rows_csv_chunks(rows, header=None, chunk_rows=10000, delimiter=","):
+    """
+    Yields CSV text of an iterable of rows (sequences or dicts) in batches.
+    For dict rows the header defaults to the keys of the first row.
+    """
+    buffer = io.StringIO()
+    writer = None
+    count = 0
+    for row in rows:
+        if writer is None:
+            if isinstance(row, dict):
+                writer = csv.DictWriter(buffer, fieldnames=header or list(row), delimiter=delimiter,
+                                        lineterminator="\n")
+                writer.writeheader()
+            else:
+                writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+                if header:
+                    writer.writerow(header)
+        writer.writerow(row)
+        count += 1
+        if count % chunk_rows == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if writer is None and header:
+        csv.writer(buffer, delimiter=delimiter, lineterminator="\n").writerow(header)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class MultipartStream:
+    """
+    multipart/form-data body produced on the fly.
+
+    Iterating yields the encoded fields and then the file, read chunk by
+    chunk from its source; requests sends it as the request body with
+    chunked transfer encoding. Use multipart_body() to get a sized body
+    (with Content-Length) when the file size is known.
+    """
+    def __init__(self, fields, file_field, filename, source, content_type=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.source = source
+        head = io.BytesIO()
+        for name, value in fields.items():
+            head.write(f"--{self.boundary}\r\n"
+                       f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                       f"{value}\r\n".encode("utf-8"))
+        content_type = (content_type or mimetypes.guess_type(filename)[0]
+                        or "application/octet-stream")
+        head.write(f"--{self.boundary}\r\n"
+                   f"Content-Disposition: form-data; name=\"{file_field}\"; "
+                   f"filename=\"{filename}\"\r\n"
+                   f"Content-Type: {content_type}\r\n\r\n".encode("utf-8"))
+        self.head = head.getvalue()
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    def __iter__(self):
+        yield self.head
+        for chunk in iter_file_chunks(self.source):
+            yield chunk
+        yield self.tail
+
+
+class _SizedMultipartStream(MultipartStream):
+    def __init__(self, size, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = size
+
+    def __len__(self):
+        return len(self.head) + self.size + len(self.tail)
+
+
+def multipart_body(fields, file_field, filename, source, content_type=None, compress=None):
+    """
+    Returns (body, content_type header) of a streaming multipart upload.
+
+    Parameters:
+        fields (dict): Plain form fields.
+        file_field (str): Form field of the file.
+        filename (str): File name shown to the recipient.
+        source: File contents, see iter_file_chunks.
+        content_type (str): MIME type of the file, guessed from filename if None.
+        compress (str): None, "gzip" or "zip"; the file is compressed while
+            being sent and ".gz"/".zip" is appended to filename.
+
+    Raises FileNotFoundError before sending if source looks like a path
+    that does not exist.
+    """
+    is_path(source)
+    if compress == "gzip":
+        source = gzip_chunks(iter_file_chunks(source))
+        filename, content_type = f"{filename}.gz", "application/gzip"
+    elif compress == "zip":
+        source = zip_chunks(iter_file_chunks(source), filename)
+        filename, content_type = f"{filename}.zip", "application/zip"
+    elif compress is not None:
+        raise ValueError(f"Unknown compression: {compress}")
+
+    size = source_size(source)
+    if size is None:
+        body = MultipartStream(fields, file_field, filename, source, content_type)
+    else:
+        body = _SizedMultipartStream(size, fields, file_field, filename, source, content_type)
+    return body, body.content_type
@@ -0,0 +1,211 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from time import time
+
+import pytz
+
+from .files import atomic_write
+
+
+# Календарные периоды: после окончания их данные больше не меняются
+CLOSED_RANGE_TYPES = {
+    "YESTERDAY", "LAST_WEEK", "LAST_BUSINESS_WEEK", "LAST_WEEK_SUN_SAT",
+    "LAST_MONTH", "CUSTOM_DATE"
+}
+
+
+def resolve_report_period(params, today):
+    """
+    Returns (date_from, date_to) of a report for the given day,
+    or None if the range cannot be resolved locally (ALL_TIME, AUTO).
+    LAST_N_DAYS ranges do not include today, as in the Reports API.
+    """
+    range_type = params.get("DateRangeType")
+    if range_type == "CUSTOM_DATE":
+        criteria = params.get("SelectionCriteria", {})
+        return (datetime.strptime(criteria["DateFrom"], "%Y-%m-%d").date(),
+                datetime.strptime(criteria["DateTo"], "%Y-%m-%d").date())
+    if range_type == "TODAY":
+        return today, today
+    if range_type == "YESTERDAY":
+        yesterday = today - timedelta(days=1)
+        return yesterday, yesterday
+    if range_type and range_type.startswith("LAST_") and range_type.endswith("_DAYS"):
+        days = int(range_type[len("LAST_"):-len("_DAYS")])
+        return today - timedelta(days=days), today - timedelta(days=1)
+    if range_type == "THIS_MONTH":
+        return today.replace(day=1), today
+    if range_type == "LAST_MONTH":
+        last_day = today.replace(day=1) - timedelta(days=1)
+        return last_day.replace(day=1), last_day
+    if range_type == "THIS_WEEK_MON_TODAY":
+        return today - timedelta(days=today.weekday()), today
+    if range_type == "THIS_WEEK_SUN_TODAY":
+        return today - timedelta(days=(today.weekday() + 1) % 7), today
+    if range_type in ("LAST_WEEK", "LAST_BUSINESS_WEEK"):
+        monday = today - timedelta(days=today.weekday() + 7)
+        if range_type == "LAST_BUSINESS_WEEK":
+            return monday, monday + timedelta(days=4)
+        return monday, monday + timedelta(days=6)
+    if range_type == "LAST_WEEK_SUN_SAT":
+        sunday = today - timedelta(days=(today.weekday() + 1) % 7 + 7)
+        return sunday, sunday + timedelta(days=6)
+    return None
+
+
+class ReportCache:
+    """
+    On-disk gzip cache of Yandex Direct report bodies.
+
+    Keys are (login, report body without ReportName, resolved period), so
+    LAST_MONTH requested in March and in April are different entries.
+    Reports of closed calendar periods (LAST_MONTH, past CUSTOM_DATE, ...)
+    never expire; rolling ranges (LAST_3_DAYS, THIS_MONTH, ...) live for
+    ttl seconds. When the cache grows over max_bytes, least recently
+    used entries are removed.
+    """
+    def __init__(self, directory=".report_cache", ttl=3600, max_bytes=512 * 1024 * 1024,
+                 settle_days=1, timezone="Europe/Moscow"):
+        """
+        Parameters:
+            directory (str): Cache directory, created if missing.
+            ttl (int): Lifetime of rolling-range reports, seconds.
+            max_bytes (int): Size cap of the cache directory.
+            settle_days (int): A period counts as closed only when it ended
+                more than this many days ago (late statistics adjustments).
+            timezone (str): Timezone used to resolve "today".
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.settle_days = settle_days
+        self.timezone = pytz.timezone(timezone)
+        self._lock = threading.Lock()
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _today(self):
+        return datetime.now(self.timezone).date()
+
+    def _entry(self, login, body):
+        """
+        Returns (cache key, expiry timestamp or None for permanent entries)
+        """
+        params = dict(body.get("params", body))
+        params.pop("ReportName", None)
+        today = self._today()
+        period = resolve_report_period(params, today)
+
+        closed = (period is not None
+                  and params.get("DateRangeType") in CLOSED_RANGE_TYPES
+                  and period[1] < today - timedelta(days=self.settle_days))
+
+        material = json.dumps({
+            "login": login,
+            "params": params,
+            "period": [d.isoformat() for d in period] if period else today.isoformat()
+        }, sort_keys=True, ensure_ascii=False)
+        key = hashlib.sha256(material.encode("utf-8")).hexdigest()
+        return key, None if closed else time() + self.ttl
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.tsv.gz")
+
+    def get(self, login, body):
+        """
+        Returns cached report text, or None if missing or expired
+        """
+        key, _ = self._entry(login, body)
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8", newline="") as f:
+                header = json.loads(f.readline())
+                if header["expires"] is not None and header["expires"] < time():
+                    expired = True
+                else:
+                    expired = False
+                    text = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if expired:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def set(self, login, body, text):
+        """
+        Stores report text
+        """
+        key, expires = self._entry(login, body)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        old_size = os.path.getsize(path) if os.path.exists(path) else 0
+        with atomic_write(path, "wb") as raw, \
+                gzip.open(raw, "wt", encoding="utf-8", newline="") as f:
+            f.write(json.dumps({"expires": expires}) + "\n")
+            f.write(text)
+
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(path) - old_size
+        self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tsv.gz"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _evict(self):
+        """
+        Removes least recently used entries while the cache is over max_bytes
+        """
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            if self._size <= self.max_bytes:
+                return
+            entries = sorted(self._entries())
+            self._size = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if self._size <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._size -= size
+
+    def clear(self):
+        """
+        Removes all cached reports
+        """
+        for _, _, path in list(self._entries()):
+            self._remove(path)
+        with self._lock:
+            self._size = 0
@@ -0,0 +1,180 @@
+import heapq
+import json
+import logging
+from collections import deque
+from itertools import count
+from time import monotonic, perf_counter, sleep
+
+from .instrumentation import ReportEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUED_PER_LOGIN = 5
+
+
+class _ReportJob:
+    def __init__(self, key, token, login, body):
+        self.key = key
+        self.token = token
+        self.login = login
+        self.body = body
+        self.request_body = json.dumps(body, indent=4)
+        self.network_attempt = 0
+        self.queued = False
+        self.attempts = 0
+        self.started = None
+        self.queue_wait = 0.0
+        self.status_code = None
+        self.request_id = None
+
+
+class ReportScheduler:
+    """
+    Submit-then-poll scheduler for Yandex Direct reports.
+
+    All added reports are submitted first; reports that went offline
+    (201/202) are then polled in order of their own retryIn, so report
+    generation on Yandex side overlaps across accounts. At most
+    max_queued_per_login reports are in flight for one advertiser
+    (Client-Login) at a time, counted from their first attempt (a retry
+    after a network error may still be queued by the API); the rest wait
+    locally until a slot frees up.
+
+    Usage:
+        scheduler = ReportScheduler(direct)
+        scheduler.add("login1", token1, "login1", body)
+        results = scheduler.run()  # {key: tsv text or None}
+    """
+    def __init__(self, client, max_queued_per_login=DEFAULT_MAX_QUEUED_PER_LOGIN,
+                 default_retry_in=60, max_network_retries=3, cache_mode=None):
+        """
+        Parameters:
+            client (YandexDirect): Client used to send the requests.
+            max_queued_per_login (int): Reports in flight per advertiser
+                at the same time.
+            default_retry_in (int): Poll delay when retryIn header is missing.
+            max_network_retries (int): Network errors tolerated per report.
+            cache_mode (str): Report cache mode passed to the client
+                ("use", "refresh" or "bypass"), client default if None.
+        """
+        self.client = client
+        self.max_queued_per_login = max(1, max_queued_per_login)
+        self.default_retry_in = default_retry_in
+        self.max_network_retries = max_network_retries
+        self.cache_mode = cache_mode
+        self._jobs = []
+
+    def add(self, key, token, login, body):
+        """
+        Adds a report to the schedule. key identifies the result in run().
+        """
+        self._jobs.append(_ReportJob(key, token, login, body))
+
+    def run(self):
+        """
+        Submits all reports and polls until every one is finished.
+
+        Returns:
+            dict: {key: TSV text, or None if the report failed}
+        """
+        jobs, self._jobs = self._jobs, []
+        results = {}
+        waiting = {}
+        queued = {}
+        due = []
+        order = count()
+
+        instrumentation = self.client.instrumentation
+
+        for job in jobs:
+            cached = self.client._cache_get(job.login, job.body, self.cache_mode)
+            if cached is not None:
+                results[job.key] = cached
+                instrumentation.on_report(ReportEvent(
+                    job.login, job.body.get("params", {}).get("ReportName"),
+                    status_code=200, cached=True))
+                continue
+            waiting.setdefault(job.login, deque()).append(job)
+            queued.setdefault(job.login, 0)
+
+        def finish(job, text):
+            results[job.key] = text
+            instrumentation.on_report(ReportEvent(
+                job.login, job.body.get("params", {}).get("ReportName"),
+                status_code=job.status_code,
+                duration=perf_counter() - job.started,
+                queue_wait=job.queue_wait,
+                retries=job.attempts - 1,
+                request_id=job.request_id
+            ))
+            if job.queued:
+                queued[job.login] -= 1
+                submit_waiting(job.login)
+
+        def attempt(job):
+            self.client.rate_limiter.acquire(job.token)
+            if job.started is None:
+                job.started = perf_counter()
+            if not job.queued:
+                # Слот занимается с первой попытки: запрос после сетевой ошибки
+                # мог дойти до API, и повтор получит 201
+                job.queued = True
+                queued[job.login] += 1
+            job.attempts += 1
+            try:
+                req = self.client._post_report(job.token, job.login, job.request_body)
+            except Exception as e:
+                job.network_attempt += 1
+                job.status_code = None
+                logger.warning("Произошла ошибка соединения с сервером API для %s: %s", job.login, e)
+                if job.network_attempt >= self.max_network_retries:
+                    finish(job, None)
+                else:
+                    heapq.heappush(due, (monotonic() + 2, next(order), job))
+                return
+
+            request_id = req.headers.get('RequestId')
+            job.status_code = req.status_code
+            job.request_id = request_id
+            if req.status_code == 200:
+                logger.info("Отчет для аккаунта %s создан успешно, RequestId: %s", job.login, request_id)
+                self.client._cache_set(job.login, job.body, req.text, self.cache_mode)
+                finish(job, req.text or "")
+            elif req.status_code in (201, 202):
+                retryIn = int(req.headers.get("retryIn", self.default_retry_in))
+                if req.status_code == 201:
+                    logger.debug("Отчет для аккаунта %s поставлен в очередь в режиме offline, "
+                                 "RequestId: %s", job.login, request_id)
+                job.queue_wait += retryIn
+                heapq.heappush(due, (monotonic() + retryIn, next(order), job))
+            else:
+                logger.warning("Ошибка формирования отчета для %s: статус %s, RequestId: %s, "
+                               "ответ сервера: %s", job.login, req.status_code, request_id, req.text)
+                finish(job, None)
+
+        submitting = set()
+
+        def submit_waiting(login):
+            # Отчет, готовый сразу, освобождает слот внутри attempt; цикл ниже
+            # продолжит отправку сам, без рекурсии
+            if login in submitting:
+                return
+            submitting.add(login)
+            try:
+                pending = waiting[login]
+                while pending and queued[login] < self.max_queued_per_login:
+                    attempt(pending.popleft())
+            finally:
+                submitting.discard(login)
+
+        for login in list(waiting):
+            submit_waiting(login)
+
+        while due:
+            ready_at, _, job = heapq.heappop(due)
+            delay = ready_at - monotonic()
+            if delay > 0:
+                sleep(delay)
+            attempt(job)
+
+        return results
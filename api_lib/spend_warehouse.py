@@ -0,0 +1,270 @@
+import json
+import logging
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+import pytz
+
+from .concurrency import map_concurrently
+from .direct_reports import daily_spent_report_body, report_to_dataframe
+from .files import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def _months(date_from, date_to):
+    """
+    Returns "YYYY-MM" of every month between two dates
+    """
+    months = []
+    current = date_from.replace(day=1)
+    while current <= date_to:
+        months.append(current.strftime("%Y-%m"))
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+class SpendWarehouse:
+    """
+    Local store of daily Yandex Direct spend per login, filled incrementally.
+
+    sync() requests a CUSTOM_DATE report grouped by Date only for days not
+    stored yet, plus the last recheck_days days (late adjustments of the
+    statistics), and writes them to Parquet files partitioned as
+    {directory}/login={login}/month={YYYY-MM}.parquet. Stored days of a
+    login are one continuous range, synced_from()..synced_through();
+    sync(since=...) backfills days before it. spent() and spent_frame()
+    answer from these files, covers() tells whether a range is stored.
+
+    Requires pyarrow (pip install api_lib[warehouse]).
+    """
+    def __init__(self, client, directory="spend_warehouse", recheck_days=3, history_days=90,
+                 max_workers=4, timezone="Europe/Moscow"):
+        """
+        Parameters:
+            client (YandexDirect): Client used for reports.
+            directory (str): Root directory of the store.
+            recheck_days (int): Last stored days (up to synced_through)
+                re-requested on every sync.
+            history_days (int): Days loaded on the first sync of a login.
+            max_workers (int): Logins synced at once.
+            timezone (str): Timezone used to resolve "today".
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("SpendWarehouse requires pyarrow: pip install pyarrow")
+        self.client = client
+        self.directory = directory
+        self.recheck_days = recheck_days
+        self.history_days = history_days
+        self.max_workers = max_workers
+        self.timezone = pytz.timezone(timezone)
+        self._state_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._state = self._load_state()
+
+    def _today(self):
+        return datetime.now(self.timezone).date()
+
+    def _state_path(self):
+        return os.path.join(self.directory, "_synced.json")
+
+    def _load_state(self):
+        try:
+            with open(self._state_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        with atomic_write(self._state_path()) as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+
+    def _synced_range(self, login):
+        value = self._state.get(login)
+        if not isinstance(value, dict):
+            return None, None
+        return _as_date(value["from"]), _as_date(value["through"])
+
+    def synced_from(self, login):
+        """
+        Returns the first day stored for login, or None
+        """
+        return self._synced_range(login)[0]
+
+    def synced_through(self, login):
+        """
+        Returns the last day stored for login, or None
+        """
+        return self._synced_range(login)[1]
+
+    def covers(self, login, date_from, date_to):
+        """
+        Returns True if every day of date_from..date_to is stored for login
+        """
+        synced_from, synced_through = self._synced_range(login)
+        return (synced_from is not None and synced_from <= _as_date(date_from)
+                and _as_date(date_to) <= synced_through)
+
+    def _partition_path(self, login, month):
+        return os.path.join(self.directory, f"login={login}", f"month={month}.parquet")
+
+    def _read_partition(self, login, month):
+        import pandas as pd
+
+        path = self._partition_path(login, month)
+        if not os.path.exists(path):
+            return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"),
+                                 "cost": pd.Series(dtype="float64")})
+        return pd.read_parquet(path)
+
+    def _write_partition(self, login, month, df):
+        path = self._partition_path(login, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_write(path, "wb") as f:
+            df.to_parquet(f, index=False)
+
+    def _store(self, login, date_from, date_to, days):
+        """
+        Replaces stored days date_from..date_to of login with days
+        (DataFrame date, cost), one partition file per month
+        """
+        import pandas as pd
+
+        start, end = pd.Timestamp(date_from), pd.Timestamp(date_to)
+        for month in _months(date_from, date_to):
+            stored = self._read_partition(login, month)
+            stored = stored[(stored["date"] < start) | (stored["date"] > end)]
+            new = days[days["date"].dt.strftime("%Y-%m") == month]
+            merged = pd.concat([stored, new], ignore_index=True) if len(stored) else new
+            self._write_partition(login, month, merged.sort_values("date", ignore_index=True))
+
+    def _load_range(self, login, token, date_from, date_to):
+        """
+        Requests daily spend of login for date_from..date_to, stores it
+        and extends the synced range of login
+        """
+        import pandas as pd
+
+        body = daily_spent_report_body(date_from.isoformat(), date_to.isoformat())
+        tsv_text = self.client._request_report(token, login, body, cache_mode="bypass")
+        if tsv_text is None:
+            raise RuntimeError(f"Отчет по дням для {login} не получен")
+
+        df = report_to_dataframe(tsv_text, ["Date", "Cost"])
+        days = pd.DataFrame({
+            "date": pd.to_datetime(df["Date"].astype("object"), errors="coerce"),
+            "cost": df["Cost"].fillna(0.0).astype("float64")
+        }).dropna(subset=["date"])
+        # В отчете могут быть несколько строк за день, храним сумму
+        days = days.groupby("date", as_index=False)["cost"].sum()
+
+        self._store(login, date_from, date_to, days)
+        with self._state_lock:
+            synced_from, synced_through = self._synced_range(login)
+            self._state[login] = {
+                "from": min(date_from, synced_from or date_from).isoformat(),
+                "through": max(date_to, synced_through or date_to).isoformat()
+            }
+            self._save_state()
+        logger.info("Траты %s за %s - %s сохранены (%s дней)", login, date_from, date_to, len(days))
+        return (date_to - date_from).days + 1
+
+    def _sync_login(self, login, token, until, since):
+        synced_from, synced_through = self._synced_range(login)
+        if synced_from is None:
+            date_from = until - timedelta(days=self.history_days - 1)
+            if since is not None:
+                date_from = min(date_from, since)
+            return self._load_range(login, token, date_from, until)
+
+        # Оба диапазона примыкают к сохраненному, чтобы в нем не было дыр
+        ranges = []
+        if since is not None and since < synced_from:
+            ranges.append((since, synced_from - timedelta(days=1)))
+        # Последние recheck_days сохраненных дней запрашиваем заново:
+        # статистика за них еще могла измениться
+        date_from = max(synced_from, synced_through - timedelta(days=self.recheck_days - 1))
+        date_to = max(until, synced_through)
+        if date_from <= date_to:
+            ranges.append((date_from, date_to))
+        return sum(self._load_range(login, token, date_from, date_to)
+                   for date_from, date_to in ranges)
+
+    def sync(self, accounts, until=None, since=None):
+        """
+        Loads missing and recent days for every login.
+
+        Parameters:
+            accounts (dict or list): {login: token}, or logins of agency
+                clients requested with the client token.
+            until (str or date): Last day to load, yesterday by default
+                (today is still changing).
+            since (str or date): First day that must be stored; days
+                before synced_from() are backfilled. The first sync of a
+                login loads at least history_days days.
+
+        Returns:
+            dict: {login: number of days requested, or the exception text}
+        """
+        agency = not isinstance(accounts, dict)
+        if agency:
+            accounts = {login: self.client.token for login in accounts}
+        until = _as_date(until) if until else self._today() - timedelta(days=1)
+        since = _as_date(since) if since else None
+        items = list(accounts.items())
+
+        def sync(item):
+            login, token = item
+            if agency:
+                self.client.agency_rate_limiter.acquire()
+            else:
+                self.client.rate_limiter.acquire(token)
+            return self._sync_login(login, token, until, since)
+
+        results = {}
+        for (login, _), result in zip(items, map_concurrently(sync, items, self.max_workers)):
+            if isinstance(result, Exception):
+                logger.warning("Не удалось обновить траты %s: %s", login, result)
+                result = str(result)
+            results[login] = result
+        return results
+
+    def spent_frame(self, logins, date_from, date_to):
+        """
+        Returns stored daily spend as a DataFrame with columns login, date, cost
+        """
+        import pandas as pd
+
+        date_from, date_to = _as_date(date_from), _as_date(date_to)
+        start, end = pd.Timestamp(date_from), pd.Timestamp(date_to)
+        frames = []
+        for login in logins:
+            for month in _months(date_from, date_to):
+                df = self._read_partition(login, month)
+                df = df[(df["date"] >= start) & (df["date"] <= end)]
+                if len(df):
+                    frames.append(df.assign(login=login))
+        if not frames:
+            return pd.DataFrame({"login": pd.Series(dtype="object"),
+                                 "date": pd.Series(dtype="datetime64[ns]"),
+                                 "cost": pd.Series(dtype="float64")})
+        return pd.concat(frames, ignore_index=True)[["login", "date", "cost"]]
+
+    def spent(self, login, date_from, date_to):
+        """
+        Returns stored spend of login over date_from..date_to.
+        Days outside synced_from(login)..synced_through(login) are not
+        counted, check covers() first.
+        """
+        return float(self.spent_frame([login], date_from, date_to)["cost"].sum())
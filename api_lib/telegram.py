@@ -0,0 +1,217 @@
+import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from time import monotonic, sleep
+
+from .concurrency import RateLimiter
+from .transport import create_session
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram на длину одного сообщения
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+
+# Telegram bot
+class TelegramBot:
+    def __init__(self, token, chat_id, session=None):
+        """
+        Initializes a new instance of the telegram bot with the provided 
+        token and chat ID.
+
+        Parameters:
+            token (str): The token for the Telegram bot.
+            chat_id (int): The ID of the chat.
+            session (requests.Session): Optional shared session, a pooled
+                one is created if None.
+        """
+        self.token = token
+        self.session = session or create_session()
+        self.base_url = f"https://api.telegram.org/bot{token}/"
+        self.chat_id = chat_id
+
+    def send_message(self, text, chat_id=None):
+        """
+        Sends text to chat_id (self.chat_id if None) and returns the API response.
+        Blocks until sent; see TelegramSendQueue for background sending.
+        """
+        url = self.base_url + "sendMessage"
+        params = {"chat_id": chat_id or self.chat_id, "text": text}
+        response = self.session.post(url, params=params)
+        return response.json()
+
+
+class _Batch:
+    __slots__ = ("chat_id", "texts", "futures", "due", "attempts")
+
+    def __init__(self, chat_id, text, future, due):
+        self.chat_id = chat_id
+        self.texts = [text]
+        self.futures = [future]
+        self.due = due
+        self.attempts = 0
+
+    def fits(self, text):
+        return sum(len(t) + 1 for t in self.texts) + len(text) <= TELEGRAM_MAX_MESSAGE_LENGTH
+
+
+class TelegramSendQueue:
+    """
+    Background sender for TelegramBot with Telegram rate limits.
+
+    Messages go to a bounded in-memory queue and are sent by one worker
+    thread, at most per_chat_rate messages per second to one chat and
+    global_rate messages per second in total. On 429 the chat waits for
+    retry_after from the response. Messages to the same chat that arrive
+    within coalesce_window seconds are joined into one message (up to
+    4096 characters).
+
+        with TelegramSendQueue(bot, coalesce_window=2) as sender:
+            sender.send("alert")                 # fire-and-forget
+            result = sender.send("report").result()
+    """
+    def __init__(self, bot, maxsize=1000, per_chat_rate=1.0, global_rate=30.0,
+                 coalesce_window=0.0, max_retries=3, separator="\n"):
+        """
+        Parameters:
+            bot (TelegramBot): Bot used to send messages.
+            maxsize (int): Queue capacity, send blocks or raises queue.Full
+                when it is reached.
+            per_chat_rate (float): Messages per second to one chat.
+            global_rate (float): Messages per second to all chats.
+            coalesce_window (float): Seconds to wait for more messages to
+                the same chat before sending, 0 disables coalescing.
+            max_retries (int): Resends of a message after 429 or a network error.
+            separator (str): Joins coalesced messages.
+        """
+        self.bot = bot
+        self.per_chat_interval = 1.0 / per_chat_rate if per_chat_rate > 0 else 0.0
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.separator = separator
+        self._global_limiter = RateLimiter(rate=global_rate)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._pending = {}
+        self._next_allowed = {}
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="TelegramSendQueue", daemon=True)
+        self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, text, chat_id=None, block=True, timeout=None):
+        """
+        Queues text for chat_id (bot.chat_id if None).
+
+        Returns:
+            Future: Resolves to the API response of the message that
+                carried the text, or to the exception if it was not sent.
+        Raises queue.Full if the queue is full and block is False or
+        timeout expired.
+        """
+        if self._closed:
+            raise RuntimeError("TelegramSendQueue is closed")
+        future = Future()
+        self._queue.put((chat_id or self.bot.chat_id, text, future), block, timeout)
+        return future
+
+    def close(self, timeout=None):
+        """
+        Sends everything queued and stops the worker
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join(timeout)
+
+    def _add(self, chat_id, text, future, now):
+        batches = self._pending.setdefault(chat_id, deque())
+        if self.coalesce_window > 0 and batches:
+            last = batches[-1]
+            if last.attempts == 0 and last.due > now and last.fits(text):
+                last.texts.append(text)
+                last.futures.append(future)
+                return
+        batches.append(_Batch(chat_id, text, future, now + self.coalesce_window))
+
+    def _ready_at(self, batch):
+        return max(batch.due, self._next_allowed.get(batch.chat_id, 0.0))
+
+    def _next_batch(self, now):
+        """
+        Returns (batch ready to send or None, seconds until the next one)
+        """
+        best, best_at = None, None
+        for batches in self._pending.values():
+            ready_at = self._ready_at(batches[0])
+            if best_at is None or ready_at < best_at:
+                best, best_at = batches[0], ready_at
+        if best is None:
+            return None, None
+        if best_at <= now:
+            return best, 0.0
+        return None, best_at - now
+
+    def _run(self):
+        stopping = False
+        while True:
+            now = monotonic()
+            batch, wait = self._next_batch(now)
+            if batch is not None:
+                self._send(batch)
+                continue
+            if stopping and wait is None:
+                return
+            try:
+                # При остановке не ждем окна склейки, отправляем сразу
+                item = self._queue.get(timeout=wait if not stopping else 0.0)
+            except queue.Empty:
+                if stopping:
+                    for batches in self._pending.values():
+                        batches[0].due = 0.0
+                    # Очередь пуста, осталось ждать интервала чата или retry_after
+                    batch, wait = self._next_batch(monotonic())
+                    if batch is None and wait:
+                        sleep(wait)
+                continue
+            if item is None:
+                stopping = True
+                continue
+            self._add(*item, monotonic())
+
+    def _done(self, batch):
+        batches = self._pending[batch.chat_id]
+        batches.popleft()
+        if not batches:
+            del self._pending[batch.chat_id]
+
+    def _send(self, batch):
+        self._global_limiter.acquire()
+        batch.attempts += 1
+        self._next_allowed[batch.chat_id] = monotonic() + self.per_chat_interval
+        try:
+            result = self.bot.send_message(self.separator.join(batch.texts), batch.chat_id)
+        except Exception as e:
+            logger.warning("Ошибка отправки сообщения в Telegram (чат %s): %s", batch.chat_id, e)
+            if batch.attempts > self.max_retries:
+                self._done(batch)
+                for future in batch.futures:
+                    future.set_exception(e)
+            return
+
+        if result.get("error_code") == 429 and batch.attempts <= self.max_retries:
+            retry_after = result.get("parameters", {}).get("retry_after", 1)
+            logger.warning("Telegram: превышен лимит для чата %s, повтор через %s сек.",
+                           batch.chat_id, retry_after)
+            self._next_allowed[batch.chat_id] = monotonic() + retry_after
+            return
+
+        self._done(batch)
+        for future in batch.futures:
+            future.set_result(result)
@@ -0,0 +1,76 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_TIMEOUT = (10, 300)
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with a mounted connection pool and a default timeout.
+
+    Every request made through the session reuses keep-alive connections
+    from the pool, so repeated calls to the same host skip the TCP+TLS
+    handshake. A timeout passed to a single call overrides the default.
+    """
+    def __init__(self, timeout=DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_connections=10, pool_maxsize=10, max_retries=0,
+                   timeout=DEFAULT_TIMEOUT, keep_alive=True):
+    """
+    Creates a pooled HTTP session
+
+    Parameters:
+        pool_connections (int): Number of per-host pools to cache.
+        pool_maxsize (int): Max connections kept per host. Should be at least
+            the number of threads sharing the session.
+        max_retries (int): Retries on failed connections (not on HTTP errors).
+        timeout (float or tuple): Default (connect, read) timeout in seconds.
+        keep_alive (bool): If False, every response closes its connection.
+
+    Returns:
+        PooledSession
+    """
+    session = PooledSession(timeout=timeout)
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          max_retries=max_retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+
+def get_default_session():
+    """
+    Returns the process-wide session shared by module-level functions
+    """
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = create_session()
+    return _default_session
+
+
+def set_default_session(session):
+    """
+    Replaces the process-wide session (e.g. with a differently sized pool)
+    """
+    global _default_session
+    with _default_session_lock:
+        _default_session = session
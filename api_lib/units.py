@@ -0,0 +1,133 @@
+import threading
+from time import sleep, time
+
+
+# Ошибка 152: недостаточно баллов для выполнения запроса
+NOT_ENOUGH_UNITS_ERROR_CODE = 152
+
+
+def parse_units_header(value):
+    """
+    Parses the Units header of a Yandex Direct response.
+
+    Returns:
+        tuple: (spent, rest, limit) as ints, or None if the header is missing
+            or malformed. Example header: "10/20828/64000".
+    """
+    if not value:
+        return None
+    try:
+        spent, rest, limit = (int(part) for part in value.split("/"))
+    except ValueError:
+        return None
+    return spent, rest, limit
+
+
+class UnitsTracker:
+    """
+    Tracks Yandex Direct API points (units) per agency/advertiser and
+    paces requests by the remaining budget.
+
+    Every response with a Units header updates the budget of the login that
+    was charged (Units-Used-Login header, the agency for agency requests).
+    While more than slow_below of the daily limit is left, requests go
+    without delay. Below that the delay grows linearly up to max_delay as
+    the rest approaches zero, and after error 152 (or when the rest drops
+    under the cost of the last request) requests wait exhausted_pause
+    seconds, since points come back gradually during the day.
+    """
+    def __init__(self, slow_below=0.2, max_delay=5.0, exhausted_pause=60.0):
+        """
+        Parameters:
+            slow_below (float): Share of the daily limit below which
+                requests start to slow down.
+            max_delay (float): Delay before a request when almost no
+                points are left, seconds.
+            exhausted_pause (float): Delay before a request when points
+                are exhausted, seconds.
+        """
+        self.slow_below = slow_below
+        self.max_delay = max_delay
+        self.exhausted_pause = exhausted_pause
+        self._budgets = {}
+        self._charged_login = {}
+        self._lock = threading.Lock()
+
+    def update(self, login, units_header, used_login=None):
+        """
+        Records the Units header of a response to a request made for login
+        (None for requests without Client-Login).
+        """
+        units = parse_units_header(units_header)
+        if units is None:
+            return
+        spent, rest, limit = units
+        charged = used_login or login
+        with self._lock:
+            self._charged_login[login] = charged
+            self._budgets[charged] = {
+                'login': charged,
+                'spent': spent,
+                'rest': rest,
+                'limit': limit,
+                'exhausted': rest < spent,
+                'updated': time()
+            }
+
+    def mark_exhausted(self, login):
+        """
+        Marks the budget charged for login as exhausted (error 152)
+        """
+        with self._lock:
+            charged = self._charged_login.get(login, login)
+            budget = self._budgets.setdefault(charged, {
+                'login': charged, 'spent': None, 'rest': 0, 'limit': None
+            })
+            budget['rest'] = 0
+            budget['exhausted'] = True
+            budget['updated'] = time()
+
+    def budget(self, login=None):
+        """
+        Returns the last known budget charged for login:
+        {'login', 'spent', 'rest', 'limit', 'exhausted', 'updated'},
+        or None if no response with a Units header was seen yet.
+        'spent' is the cost of the last request.
+        """
+        with self._lock:
+            budget = self._budgets.get(self._charged_login.get(login, login))
+            return dict(budget) if budget else None
+
+    def budgets(self):
+        """
+        Returns budgets of all known logins as {login: budget}
+        """
+        with self._lock:
+            return {login: dict(budget) for login, budget in self._budgets.items()}
+
+    def delay(self, login=None):
+        """
+        Returns seconds to wait before the next request for login
+        """
+        budget = self.budget(login)
+        if budget is None:
+            return 0.0
+        if budget['exhausted']:
+            # Баллы восстанавливаются постепенно, после паузы пробуем снова
+            if time() - budget['updated'] < self.exhausted_pause:
+                return self.exhausted_pause - (time() - budget['updated'])
+            return 0.0
+        if not budget['limit']:
+            return 0.0
+        share = budget['rest'] / budget['limit']
+        if share >= self.slow_below:
+            return 0.0
+        return self.max_delay * (1 - share / self.slow_below)
+
+    def wait(self, login=None):
+        """
+        Blocks for delay(login) seconds
+        """
+        delay = self.delay(login)
+        if delay > 0:
+            sleep(delay)
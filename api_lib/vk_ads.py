@@ -0,0 +1,354 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from time import sleep, time
+
+from .concurrency import RateLimiter, map_concurrently
+from .files import atomic_write
+from .transport import get_default_session
+
+logger = logging.getLogger(__name__)
+
+
+def _request_token(refresh_token, client_secret, client_id, session=None):
+    """
+    Returns the token endpoint response:
+    {'access_token', 'expires_in', 'refresh_token', ...}
+    """
+    url = "https://ads.vk.com/api/v2/oauth2/token.json"
+    headers = {
+        "Content-Type": "application/x-www-form-urlencoded"
+    }
+
+    data = {
+        "grant_type": "refresh_token",
+        "refresh_token": refresh_token,
+        "client_secret": client_secret,
+        "client_id": client_id
+    }
+
+    session = session or get_default_session()
+    response = session.post(url, headers=headers, data=data)
+    return response.json()
+
+
+def refresh_token_ads_vk(refresh_token, client_secret, client_id, session=None):
+    """
+    Refreshes access token
+    session - optional requests.Session, shared default pool if None
+    Every call is a request to VK; use VkAdsTokenManager to reuse the token.
+    """
+    return _request_token(refresh_token, client_secret, client_id, session)['access_token']
+
+
+class VkAdsTokenManager:
+    """
+    Keeps a VK Ads access token and refreshes it only when needed.
+
+    The token is reused until refresh_margin seconds before expires_in.
+    Only one thread refreshes at a time, the others wait and get its
+    result. With path set, tokens are stored in a JSON file and picked
+    up after a restart.
+
+    The manager can be passed instead of access_token to
+    get_balance_vk_accs and get_spent_vk_client.
+    """
+    def __init__(self, refresh_token, client_secret, client_id, path=None,
+                 refresh_margin=300, session=None):
+        """
+        Parameters:
+            refresh_token (str): OAuth refresh token.
+            client_secret (str): Application client_secret.
+            client_id (str): Application client_id.
+            path (str): Optional file to persist tokens in.
+            refresh_margin (int): Refresh this many seconds before expiry.
+            session (requests.Session): Optional session, shared default
+                pool if None.
+        """
+        self.refresh_token = refresh_token
+        self.client_secret = client_secret
+        self.client_id = client_id
+        self.path = path
+        self.refresh_margin = refresh_margin
+        self.session = session
+        self.access_token = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+        if path:
+            self._load()
+
+    def _valid(self):
+        return self.access_token is not None and time() < self.expires_at - self.refresh_margin
+
+    def get_token(self):
+        """
+        Returns a valid access token, refreshing it if it is about to expire
+        """
+        if self._valid():
+            return self.access_token
+        with self._lock:
+            # Пока ждали блокировку, токен мог обновить другой поток
+            if not self._valid():
+                self._refresh()
+            return self.access_token
+
+    def invalidate(self, access_token=None):
+        """
+        Forgets the access token (e.g. after 401), the next get_token refreshes it.
+        If access_token is given, only forgets it if it is still the current one.
+        """
+        with self._lock:
+            if access_token is None or access_token == self.access_token:
+                self.access_token = None
+                self.expires_at = 0.0
+
+    def _refresh(self):
+        logger.info("Обновляю токен VK Ads для client_id %s", self.client_id)
+        data = _request_token(self.refresh_token, self.client_secret, self.client_id,
+                              self.session)
+        if 'access_token' not in data:
+            raise RuntimeError(f"Не удалось обновить токен VK Ads: {data}")
+        self.access_token = data['access_token']
+        self.expires_at = time() + float(data.get('expires_in', 0))
+        # VK может выдать новый refresh_token вместе с access_token
+        self.refresh_token = data.get('refresh_token') or self.refresh_token
+        if self.path:
+            self._save()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if str(data.get('client_id')) != str(self.client_id):
+            return
+        self.access_token = data.get('access_token')
+        self.expires_at = float(data.get('expires_at', 0))
+        self.refresh_token = data.get('refresh_token') or self.refresh_token
+
+    def _save(self):
+        with atomic_write(self.path) as f:
+            json.dump({
+                'client_id': self.client_id,
+                'access_token': self.access_token,
+                'refresh_token': self.refresh_token,
+                'expires_at': self.expires_at
+            }, f)
+
+
+def _get_with_token(session, url, access_token, params):
+    """
+    GET with a Bearer token given as a string or a VkAdsTokenManager.
+    With a manager a 401 response invalidates the token and the
+    request is repeated once with a fresh one.
+    """
+    session = session or get_default_session()
+    manager = access_token if isinstance(access_token, VkAdsTokenManager) else None
+    token = manager.get_token() if manager else access_token
+    response = session.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    if manager and response.status_code == 401:
+        manager.invalidate(token)
+        token = manager.get_token()
+        response = session.get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    return response
+
+
+VK_CLIENTS_PAGE_SIZE = 50
+
+
+def _balance_record(item):
+    return {
+        'client_name': item['user']['additional_info']['client_name'],
+        'balance': item['user']['account']['balance'],
+        'id': item['user']['id']
+    }
+
+
+def _get_clients_page(access_token, client_ids, offset, limit, session):
+    url = "https://ads.vk.com/api/v2/agency/clients.json"
+    params = {
+        "limit": limit,
+        "offset": offset
+    }
+    if client_ids:
+        params["_user__id__in"] = client_ids
+    response = _get_with_token(session, url, access_token, params)
+    return response.json()
+
+
+def iter_balance_vk_accs(access_token, client_ids=None, page_size=VK_CLIENTS_PAGE_SIZE,
+                         max_workers=4, ordered=False, session=None):
+    """
+    Yields balance records {'client_name', 'balance', 'id'} of agency clients
+    as pages of agency/clients.json arrive.
+
+    The first page gives the total count, the other pages are then
+    requested concurrently on max_workers threads.
+    access_token - token string or VkAdsTokenManager
+    client_ids - string with client ids with comma separated, all clients if None
+    ordered - yield pages in offset order instead of arrival order
+    session - optional requests.Session, shared default pool if None
+    """
+    session = session or get_default_session()
+    first_page = _get_clients_page(access_token, client_ids, 0, page_size, session)
+    for item in first_page['items']:
+        yield _balance_record(item)
+
+    total = first_page.get('count', len(first_page['items']))
+    offsets = list(range(page_size, total, page_size))
+    if not offsets:
+        return
+
+    def fetch(offset):
+        return _get_clients_page(access_token, client_ids, offset, page_size, session)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(offsets)))) as pool:
+        futures = [pool.submit(fetch, offset) for offset in offsets]
+        for future in (futures if ordered else as_completed(futures)):
+            for item in future.result()['items']:
+                yield _balance_record(item)
+
+
+def get_balance_vk_accs(access_token, client_ids, session=None, page_size=VK_CLIENTS_PAGE_SIZE,
+                        max_workers=4):
+    """
+    Returns balance VK accounts
+    access_token - token string or VkAdsTokenManager
+    client_ids - string with client ids with comma separated, all clients if None
+    session - optional requests.Session, shared default pool if None
+    All pages of agency/clients.json are read, see iter_balance_vk_accs.
+    """
+    return list(iter_balance_vk_accs(access_token, client_ids, page_size, max_workers,
+                                     ordered=True, session=session))
+
+
+def get_spent_vk_client(accaunt_ids, access_token, date_from, date_to, session=None):
+    """
+    Returns stat VK campaigns
+    accaunt_ids - string with campaigns ids with comma separated
+    access_token - token string or VkAdsTokenManager
+    session - optional requests.Session, shared default pool if None
+    """
+
+    url = "https://ads.vk.com/api/v2/statistics/users/day.json"
+    params = {
+        "id": accaunt_ids,
+        "date_from": date_from,
+        "date_to": date_to,
+        "metrics": "base"
+    }
+
+    response = _get_with_token(session, url, access_token, params)
+    return response.json()
+
+
+VK_STAT_COLUMNS = ["id", "date", "shows", "clicks", "spent"]
+
+
+def _split_ids(ids, chunk_size):
+    if isinstance(ids, str):
+        ids = [part.strip() for part in ids.split(",") if part.strip()]
+    ids = [str(i) for i in ids]
+    return [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+
+
+def _split_dates(date_from, date_to, days):
+    """
+    Returns [(date_from, date_to), ...] covering the range by at most days days
+    """
+    start = date_from if isinstance(date_from, date) else datetime.strptime(date_from, "%Y-%m-%d").date()
+    end = date_to if isinstance(date_to, date) else datetime.strptime(date_to, "%Y-%m-%d").date()
+    ranges = []
+    while start <= end:
+        chunk_end = min(end, start + timedelta(days=days - 1))
+        ranges.append((start.isoformat(), chunk_end.isoformat()))
+        start = chunk_end + timedelta(days=1)
+    return ranges
+
+
+def _get_stats_chunk(ids, date_from, date_to, access_token, session, rate_limiter,
+                     max_retries=3):
+    """
+    Requests statistics/users/day.json for one chunk, waiting on 429.
+    Returns the response JSON.
+    """
+    url = "https://ads.vk.com/api/v2/statistics/users/day.json"
+    params = {
+        "id": ",".join(ids),
+        "date_from": date_from,
+        "date_to": date_to,
+        "metrics": "base"
+    }
+    for attempt in range(max_retries + 1):
+        rate_limiter.acquire()
+        response = _get_with_token(session, url, access_token, params)
+        if response.status_code != 429 or attempt == max_retries:
+            break
+        delay = float(response.headers.get("Retry-After") or 2 ** attempt)
+        logger.warning("VK Ads: превышен лимит запросов, повтор через %s сек.", delay)
+        sleep(delay)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_spent_vk_frame(accaunt_ids, access_token, date_from, date_to, ids_per_request=50,
+                       days_per_request=31, max_workers=4, requests_per_second=2.0,
+                       session=None):
+    """
+    Returns daily VK Ads statistics as a DataFrame with columns
+    id, date, shows, clicks, spent (one row per account and day).
+
+    Ids and dates are split into chunks of ids_per_request ids and
+    days_per_request days, fetched on max_workers threads with at most
+    requests_per_second requests in total; 429 responses are retried.
+
+    Parameters:
+        accaunt_ids (str or list): Ids, comma separated string or list.
+        access_token (str or VkAdsTokenManager): Token.
+        date_from, date_to (str or date): Range, "YYYY-MM-DD".
+        session (requests.Session): Optional session, shared default pool
+            if None. Its pool_maxsize should cover max_workers.
+
+    Raises the error of the first failed chunk, the result is never partial.
+    """
+    import pandas as pd
+
+    chunks = [
+        (ids, chunk_from, chunk_to)
+        for ids in _split_ids(accaunt_ids, ids_per_request)
+        for chunk_from, chunk_to in _split_dates(date_from, date_to, days_per_request)
+    ]
+    rate_limiter = RateLimiter(rate=requests_per_second)
+    session = session or get_default_session()
+
+    results = map_concurrently(
+        lambda chunk: _get_stats_chunk(chunk[0], chunk[1], chunk[2], access_token,
+                                       session, rate_limiter),
+        chunks,
+        max_workers
+    )
+
+    columns = {name: [] for name in VK_STAT_COLUMNS}
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+        for item in result.get("items", []):
+            for row in item.get("rows", []):
+                base = row.get("base", {})
+                columns["id"].append(item["id"])
+                columns["date"].append(row["date"])
+                columns["shows"].append(base.get("shows", 0))
+                columns["clicks"].append(base.get("clicks", 0))
+                columns["spent"].append(base.get("spent", 0))
+
+    df = pd.DataFrame(columns)
+    df["id"] = df["id"].astype("int64")
+    df["date"] = pd.to_datetime(df["date"])
+    df["shows"] = pd.to_numeric(df["shows"], errors="coerce").fillna(0).astype("int64")
+    df["clicks"] = pd.to_numeric(df["clicks"], errors="coerce").fillna(0).astype("int64")
+    # VK отдает spent строкой с двумя знаками после запятой
+    df["spent"] = pd.to_numeric(df["spent"], errors="coerce").fillna(0.0).astype("float64")
+    return df.sort_values(["id", "date"], ignore_index=True)
@@ -0,0 +1,147 @@
+import json
+import logging
+from time import sleep
+
+from .concurrency import RateLimiter, map_concurrently
+from .transport import get_default_session
+
+logger = logging.getLogger(__name__)
+
+VK_API_VERSION = '5.199'
+
+# execute выполняет не более 25 обращений к API за один запрос
+EXECUTE_MAX_CALLS = 25
+
+# Too many requests per second
+VK_TOO_MANY_REQUESTS_ERROR_CODE = 6
+
+
+def old_vk_get_stat_campaigns(access_token, 
+                        account_id, 
+                        campaign_ids, 
+                        date_from, 
+                        date_to,
+                        session=None):
+    """
+    Returns stat of campaigns from old VK account
+    campaign_ids - string with campaigns ids with comma separated
+    session - optional requests.Session, shared default pool if None
+    """
+    url_ads = 'https://api.vk.com/method/ads.getStatistics'
+    params = {
+    'account_id': account_id,
+    'ids_type': 'campaign',
+    'ids': campaign_ids,
+    'period': 'day',
+    'date_from': date_from,
+    'date_to': date_to,
+    'v': VK_API_VERSION
+}
+    headers = {
+    "Authorization": f"Bearer {access_token}"
+}
+    session = session or get_default_session()
+    response = session.get(url_ads, headers=headers, params=params)
+    return response.json()
+
+
+def _statistics_code(calls, date_from, date_to):
+    """
+    Returns VKScript code of one execute request with ads.getStatistics
+    for every (account_id, campaign_ids) of calls
+    """
+    statements = []
+    for account_id, campaign_ids in calls:
+        params = {
+            'account_id': account_id,
+            'ids_type': 'campaign',
+            'ids': campaign_ids,
+            'period': 'day',
+            'date_from': date_from,
+            'date_to': date_to
+        }
+        statements.append(f"API.ads.getStatistics({json.dumps(params, ensure_ascii=False)})")
+    return "return [" + ",".join(statements) + "];"
+
+
+def _split_execute_response(calls, data):
+    """
+    Returns {account_id: {'response': ...} or {'error': ...}} for one
+    execute response. Failed calls come back as false in the response
+    list, their errors are listed in execute_errors in the same order.
+    """
+    if 'error' in data:
+        return {account_id: {'error': data['error']} for account_id, _ in calls}
+
+    errors = iter(data.get('execute_errors', []))
+    results = {}
+    for (account_id, _), response in zip(calls, data.get('response') or []):
+        if response is False:
+            results[account_id] = {'error': next(errors, {'error_msg': "Unknown execute error"})}
+        else:
+            results[account_id] = {'response': response}
+    for account_id, _ in calls[len(results):]:
+        results[account_id] = {'error': {'error_msg': "No result in execute response"}}
+    return results
+
+
+def old_vk_get_stat_campaigns_batch(access_token,
+                                    campaigns_by_account,
+                                    date_from,
+                                    date_to,
+                                    batch_size=EXECUTE_MAX_CALLS,
+                                    requests_per_second=3.0,
+                                    max_workers=1,
+                                    max_retries=3,
+                                    session=None):
+    """
+    Returns stat of campaigns from many old VK accounts, packing up to
+    batch_size ads.getStatistics calls into one execute request.
+
+    Parameters:
+        campaigns_by_account (dict): {account_id: campaign_ids}, campaign_ids
+            is a string with comma separated ids.
+        requests_per_second (float): Limit of execute requests per second.
+        max_workers (int): Number of execute requests sent at once.
+        session (requests.Session): Optional session, shared default pool if None.
+
+    Returns:
+        dict: {account_id: result}, where result is shaped like the response
+            of old_vk_get_stat_campaigns: {'response': [...]} on success or
+            {'error': {...}} if the call (or the whole execute) failed.
+    """
+    url_execute = 'https://api.vk.com/method/execute'
+    headers = {
+        "Authorization": f"Bearer {access_token}"
+    }
+    session = session or get_default_session()
+    rate_limiter = RateLimiter(rate=requests_per_second)
+    batch_size = max(1, min(batch_size, EXECUTE_MAX_CALLS))
+
+    calls = list(campaigns_by_account.items())
+    batches = [calls[i:i + batch_size] for i in range(0, len(calls), batch_size)]
+
+    def run(batch):
+        data = {
+            'code': _statistics_code(batch, date_from, date_to),
+            'v': VK_API_VERSION
+        }
+        for attempt in range(max_retries + 1):
+            rate_limiter.acquire()
+            result = session.post(url_execute, headers=headers, data=data).json()
+            error = result.get('error')
+            if (not error or error.get('error_code') != VK_TOO_MANY_REQUESTS_ERROR_CODE
+                    or attempt == max_retries):
+                break
+            logger.warning("VK: слишком много запросов, повтор через %s сек.", 2 ** attempt)
+            sleep(2 ** attempt)
+        return _split_execute_response(batch, result)
+
+    results = {}
+    for batch, batch_results in zip(batches, map_concurrently(run, batches, max_workers)):
+        if isinstance(batch_results, Exception):
+            logger.warning("Ошибка запроса execute: %s", batch_results)
+            batch_results = {account_id: {'error': {'error_msg': str(batch_results)}}
+                             for account_id, _ in batch}
+        results.update(batch_results)
+    return results
@@ -0,0 +1,1291 @@
+import json
+import logging
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from time import perf_counter, sleep
+
+from requests import RequestException
+
+from .campaign_cache import CampaignCache
+from .concurrency import RateLimiter, map_concurrently
+from .direct_reports import (
+    DEFAULT_OUTSIDE_RF_LOCATION_IDS,
+    OFFLINE_STATUS_MESSAGES,
+    REPORT_ERROR_MESSAGES,
+    adnetwork_location_report_body,
+    adnetwork_report_body,
+    commission_multiplier,
+    filtered_report_body,
+    first_cost_from_tsv,
+    group_cost_frame,
+    group_location_cost_frame,
+    parse_adnetwork_costs_from_tsv,
+    parse_adnetwork_location_costs_from_tsv,
+    reconcile_row,
+    reconcile_row_from_locations,
+    report_headers,
+    report_to_dataframe,
+    spent_report_body,
+    sum_cost_frame,
+    sum_cost_from_tsv,
+)
+from .instrumentation import NOOP_INSTRUMENTATION, ReportEvent, RequestTimer
+from .report_scheduler import DEFAULT_MAX_QUEUED_PER_LOGIN, ReportScheduler
+from .transport import create_session
+from .units import NOT_ENOUGH_UNITS_ERROR_CODE, UnitsTracker
+
+logger = logging.getLogger(__name__)
+
+# Лимит идентификаторов в одном запросе к сервису Campaigns
+CAMPAIGN_IDS_PER_REQUEST = 1000
+
+
+def _error_code(response):
+    """
+    Returns error_code of an API error response (JSON v4 or v5), or None
+    """
+    content = response.content
+    if not content or b'"error_code"' not in content[:1024]:
+        return None
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        error = data.get("error", data)
+        if isinstance(error, dict):
+            try:
+                return int(error.get("error_code"))
+            except (TypeError, ValueError):
+                return None
+    return None
+
+## Yandex Direct
+class YandexDirect:
+    def __init__(self, token, session=None, requests_per_second=2.0,
+                 vectorized_parsing=False, cache=None, cache_mode="use",
+                 instrumentation=None, units_tracker=None, state_store=None,
+                 campaign_cache=None, spend_warehouse=None, agency_requests_per_second=0):
+        """
+         Initializes a new instance of the yandex direct exporter 
+         with the provided token.
+
+        Parameters: token (str) - The token for Yandex Direct API.
+                    session (requests.Session) - Optional shared session,
+                    a pooled one is created if None. For concurrent
+                    methods its pool_maxsize should cover max_workers.
+                    requests_per_second (float) - Per-token request rate
+                    used by the concurrent multi-account methods.
+                    agency_requests_per_second (float) - Request rate of
+                    bulk calls for many agency clients (client spent,
+                    bulk suspend/resume). 0 means no limit: they are
+                    bounded by max_workers and paced by units_tracker.
+                    vectorized_parsing (bool) - Parse report bodies with
+                    pandas (report_to_dataframe) instead of a Python loop.
+                    cache (ReportCache) - Optional on-disk report cache.
+                    cache_mode (str) - Default cache mode of report
+                    methods: "use", "refresh" or "bypass".
+                    instrumentation (Instrumentation) - Receives request
+                    and report events (e.g. PrometheusAggregator).
+                    Progress and errors go to the "api_lib.yandex_direct"
+                    logger.
+                    units_tracker (UnitsTracker) - Tracks API points from
+                    the Units header and slows requests down as they run
+                    out; may be shared between clients of one agency.
+                    state_store (CampaignStateStore) - Where suspended
+                    campaign ids are kept; SQLiteCampaignStateStore in
+                    campaign_state.sqlite3 (reading legacy {login}.json
+                    files) if None.
+                    campaign_cache (CampaignCache) - Cache of campaign
+                    metadata used with use_cache=True; an in-memory one
+                    is created on first use if None.
+                    spend_warehouse (SpendWarehouse) - Local store of daily
+                    spend used by get_accounts_spent_incremental; one in
+                    ./spend_warehouse is created on first use if None.
+        """
+        self.token = token
+        self.session = session or create_session()
+        self.rate_limiter = RateLimiter(rate=requests_per_second)
+        self.agency_rate_limiter = RateLimiter(rate=agency_requests_per_second)
+        self.vectorized_parsing = vectorized_parsing
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.instrumentation = instrumentation or NOOP_INSTRUMENTATION
+        self.units = units_tracker or UnitsTracker()
+        self._state_store = state_store
+        self._campaign_cache = campaign_cache
+        self._spend_warehouse = spend_warehouse
+        self.url_accounts = 'https://api.direct.yandex.ru/live/v4/json/'
+        self.url_reports = 'https://api.direct.yandex.com/json/v5/reports'
+        self.url_campaigns = 'https://api.direct.yandex.com/json/v5/campaigns'
+        self.url_clients = 'https://api.direct.yandex.com/json/v5/clients'
+        self.url_dictionaries = 'https://api.direct.yandex.com/json/v5/dictionaries'
+        self.url_changes = 'https://api.direct.yandex.com/json/v5/changes'
+        self._geo_parents = None
+
+    def get_single_account_balance(self, token, login):
+        """
+        Returns balance for a single account using individual token
+        
+        Parameters:
+            token (str): Individual account token
+            login (str): Account login
+            
+        Returns:
+            dict: {'login': str, 'amount': float, 'currency': str} or None if error
+        """
+        body = {
+            "method": "AccountManagement",
+            "token": token,
+            "locale": "ru",
+            "param": {
+                "Action": "Get",
+                "SelectionCriteria": {
+                }
+            }
+        }
+        
+        try:
+            response = self._post("accounts", self.url_accounts, login, json=body)
+            response.encoding = 'utf-8'
+            logger.debug("Статус ответа для %s: %s", login, response.status_code)
+            
+            if response.status_code == 200:
+                data = response.json()
+                
+                # Проверяем разные варианты структуры ответа
+                if 'data' in data and 'Accounts' in data['data']:
+                    account = data['data']['Accounts'][0]
+                    return {
+                        'login': account['Login'],
+                        'amount': round(float(account['Amount']), 2),
+                        'currency': account.get('Currency', 'RUB')
+                    }
+                elif 'Accounts' in data:
+                    account = data['Accounts'][0]
+                    return {
+                        'login': account['Login'],
+                        'amount': round(float(account['Amount']), 2),
+                        'currency': account.get('Currency', 'RUB')
+                    }
+                else:
+                    logger.warning("Неожиданная структура ответа для %s, ключи в ответе: %s",
+                                   login, list(data.keys()))
+                    logger.debug("Ответ для %s: %s", login, data)
+                    return None
+            elif response.status_code == 400:
+                logger.warning("Параметры запроса для %s указаны неверно: %s", login, response.text)
+                return None
+            else:
+                logger.warning("Ошибка для %s: статус %s, ответ сервера: %s",
+                               login, response.status_code, response.text)
+                return None
+                
+        except ConnectionError as e:
+            logger.warning("Ошибка соединения при запросе баланса для %s: %s", login, e)
+            return None
+        except Exception as e:
+            logger.warning("Непредвиденная ошибка для %s: %s", login, e)
+            return None
+        
+    def _fan_out(self, accounts_dict, fetch, max_workers):
+        """
+        Runs fetch(token, login) for every account on a bounded thread pool,
+        pacing calls per token with self.rate_limiter.
+        Returns non-empty results in the order of accounts_dict.
+        """
+        def run(item):
+            login, token = item
+            self.rate_limiter.acquire(token)
+            return fetch(token, login)
+
+        items = list(accounts_dict.items())
+        results = []
+        for (login, _), result in zip(items, map_concurrently(run, items, max_workers)):
+            if isinstance(result, Exception):
+                logger.warning("Непредвиденная ошибка для %s: %s", login, result)
+                continue
+            if result:
+                results.append(result)
+        return results
+
+    def get_multiple_accounts_balances(self, accounts_dict, max_workers=None):
+        """
+        Returns balances for multiple accounts with individual tokens
+        
+        Parameters:
+            accounts_dict (dict): Dictionary with {login: token} pairs
+            max_workers (int): If set, accounts are queried concurrently
+                on that many threads instead of one by one
+            
+        Returns:
+            list: List of dicts with balance info
+        """
+        if max_workers:
+            return self._fan_out(
+                accounts_dict,
+                lambda token, login: self.get_single_account_balance(token, login),
+                max_workers
+            )
+
+        balances = []
+        
+        for login, token in accounts_dict.items():
+            self.rate_limiter.acquire(token)
+            logger.info("Запрашиваю баланс для %s...", login)
+            balance = self.get_single_account_balance(token, login)
+            
+            if balance:
+                balances.append(balance)
+        
+        return balances
+    
+    def accounts_budget(self, logins):
+        """
+        Returns accounts budget (original agency method)
+        """
+        token = self.token
+        AgencyClientsBody = {
+            "method": "AccountManagement",
+            "token": token,
+            "param": {
+                "Action": "Get",
+                "SelectionCriteria": {
+                "Logins": logins  
+                }
+            }
+        }
+        response = self._post("accounts", self.url_accounts, json=AgencyClientsBody)
+    
+        if response.status_code == 200:
+            logger.debug("Request was successful")
+            json_data = response.json()
+            accounts_budget = [{'Login': account['Login'], 
+              'Amount': round(float(account['Amount']), 2)} for account in json_data['data']['Accounts']]
+            return accounts_budget
+        else:
+            logger.warning("Request failed with status code: %s, %s",
+                           response.status_code, response.text)
+
+    def get_single_account_spent(self, token, login, date_range="LAST_3_DAYS", cache_mode=None):
+        """
+        Returns spent amount for a single account using individual token
+        
+        Parameters:
+            token (str): Individual account token
+            login (str): Account login
+            date_range (str): Date range for the report (default: "LAST_3_DAYS")
+            cache_mode (str): "use", "refresh" or "bypass" (see _request_report)
+            
+        Returns:
+            dict: {'login': str, 'cost': float} or None if error
+        """
+        tsv_text = self._request_report(token, login, spent_report_body(date_range),
+                                        cache_mode=cache_mode)
+        if tsv_text is None:
+            return None
+        try:
+            return {
+                'login': login,
+                'cost': first_cost_from_tsv(tsv_text)
+            }
+        except ValueError as e:
+            logger.warning("Произошла непредвиденная ошибка для %s: %s", login, e)
+            return None
+
+    def get_multiple_accounts_spent(self, accounts_dict, date_range="LAST_3_DAYS",
+                                    max_workers=None, use_scheduler=False,
+                                    max_queued_per_login=DEFAULT_MAX_QUEUED_PER_LOGIN,
+                                    cache_mode=None):
+        """
+        Returns spent amounts for multiple accounts with individual tokens
+        
+        Parameters:
+            accounts_dict (dict): Dictionary with {login: token} pairs
+            date_range (str): Date range for the report (default: "LAST_3_DAYS")
+            max_workers (int): If set, accounts are queried concurrently
+                on that many threads instead of one by one
+            use_scheduler (bool): Submit all reports first and poll offline
+                ones together (see ReportScheduler)
+            max_queued_per_login (int): Offline reports per advertiser
+                allowed in the queue when use_scheduler is set
+            cache_mode (str): "use", "refresh" or "bypass" (see _request_report)
+            
+        Returns:
+            list: List of dicts with spent info or CSV string
+        """
+        if use_scheduler:
+            scheduler = ReportScheduler(self, max_queued_per_login=max_queued_per_login,
+                                        cache_mode=cache_mode)
+            for login, token in accounts_dict.items():
+                scheduler.add(login, token, login, spent_report_body(date_range))
+            reports = scheduler.run()
+
+            results = []
+            for login in accounts_dict:
+                tsv_text = reports.get(login)
+                if tsv_text is None:
+                    continue
+                try:
+                    results.append({'login': login, 'cost': first_cost_from_tsv(tsv_text)})
+                except ValueError as e:
+                    logger.warning("Произошла непредвиденная ошибка для %s: %s", login, e)
+            return results
+
+        if max_workers:
+            return self._fan_out(
+                accounts_dict,
+                lambda token, login: self.get_single_account_spent(token, login, date_range,
+                                                                   cache_mode),
+                max_workers
+            )
+
+        results = []
+        
+        for login, token in accounts_dict.items():
+            self.rate_limiter.acquire(token)
+            logger.info("Запрашиваю траты для %s...", login)
+            spent = self.get_single_account_spent(token, login, date_range, cache_mode)
+            
+            if spent:
+                results.append(spent)
+        
+        return results
+        
+        # Если нужен CSV формат:
+        # resultcsv = "Login,Costs\n"
+        # for result in results:
+        #     resultcsv += f"{result['login']},{result['cost']}\n"
+        # return resultcsv
+
+    def _post(self, endpoint, url, login=None, stream=False, **kwargs):
+        """
+        Sends a POST through the session and reports it to self.instrumentation.
+        endpoint is a short service name used in metrics ("reports", "campaigns", ...).
+        Waits as long as self.units asks for and records the Units header
+        of the response.
+        """
+        self.units.wait(login)
+        with RequestTimer(self.instrumentation, endpoint, login, stream=stream) as timer:
+            timer.response = self.session.post(url, stream=stream, **kwargs)
+        response = timer.response
+        self.units.update(login, response.headers.get("Units"),
+                          response.headers.get("Units-Used-Login"))
+        if not stream and _error_code(response) == NOT_ENOUGH_UNITS_ERROR_CODE:
+            logger.warning("Недостаточно баллов API для %s", login or "агентства")
+            self.units.mark_exhausted(login)
+        return response
+
+    def units_budget(self, login=None):
+        """
+        Returns the last known API points budget charged for login
+        (the agency budget for login=None), see UnitsTracker.budget.
+        """
+        return self.units.budget(login)
+
+    def _post_report(self, token, login, request_body, stream=False):
+        """
+        Sends a single report request (no 201/202 waiting) and returns the response.
+        With stream=True the body of a 200 response is left unread.
+        """
+        req = self._post("reports", self.url_reports, login, stream=stream,
+                         data=request_body, headers=report_headers(token, login))
+        req.encoding = 'utf-8'
+        if stream and req.status_code != 200:
+            # Вычитываем короткий ответ, чтобы соединение вернулось в пул
+            req.content
+        return req
+
+    def _iter_report_lines(self, req, chunk_size=65536):
+        """
+        Yields lines of a streamed report response and closes it at the end.
+        A connection drop while reading raises requests.RequestException
+        from the iteration, see _parse_report.
+        """
+        try:
+            for line in req.iter_lines(chunk_size=chunk_size, decode_unicode=True):
+                yield line
+        finally:
+            req.close()
+
+    def _request_report_tsv(self, token, login, body, max_network_retries=3, stream=False,
+                            cache_mode=None):
+        """
+        Executes a Yandex Direct report request and returns TSV text (or empty string).
+        With stream=True returns an iterator over report lines instead,
+        read from the connection as they arrive.
+        """
+        report = self._request_report(token, login, body, max_network_retries,
+                                      stream=stream, cache_mode=cache_mode)
+        return "" if report is None else report
+
+    def _cache_get(self, login, body, cache_mode=None):
+        """
+        Returns cached report text or None
+        """
+        if self.cache is None or (cache_mode or self.cache_mode) != "use":
+            return None
+        return self.cache.get(login, body)
+
+    def _cache_set(self, login, body, text, cache_mode=None):
+        if self.cache is None or (cache_mode or self.cache_mode) == "bypass":
+            return
+        try:
+            self.cache.set(login, body, text)
+        except OSError as e:
+            logger.warning("Не удалось сохранить отчет для %s в кэш: %s", login, e)
+
+    def _request_report(self, token, login, body, max_network_retries=3, stream=False,
+                        cache_mode=None, meta=None):
+        """
+        Executes a Yandex Direct report request, waiting for offline reports.
+        Returns TSV text (an iterator over lines if stream=True),
+        or None if the report failed.
+
+        cache_mode: with self.cache set, "use" reads and stores reports,
+        "refresh" skips reading but stores the new report, "bypass" does
+        neither. Defaults to self.cache_mode. A cache hit is returned as
+        text even if stream=True; streamed reports are not stored.
+
+        meta: optional dict filled with the last 'status_code', 'request_id'
+        and 'error' (exception text) of the request.
+        """
+        if meta is None:
+            meta = {}
+        meta.update({'status_code': None, 'request_id': None, 'error': None})
+        report_name = body.get("params", {}).get("ReportName")
+
+        cached = self._cache_get(login, body, cache_mode)
+        if cached is not None:
+            logger.info("Отчет для аккаунта %s взят из кэша", login)
+            meta['status_code'] = 200
+            self.instrumentation.on_report(ReportEvent(
+                login, report_name, status_code=200, cached=True))
+            return cached
+
+        requestBody = json.dumps(body, indent=4)
+        started = perf_counter()
+        queue_wait = 0.0
+        attempts = 0
+
+        def finish(result):
+            self.instrumentation.on_report(ReportEvent(
+                login, report_name,
+                status_code=meta['status_code'],
+                duration=perf_counter() - started,
+                queue_wait=queue_wait,
+                retries=max(attempts - 1, 0),
+                request_id=meta['request_id']
+            ))
+            return result
+
+        network_attempt = 0
+        while True:
+            attempts += 1
+            try:
+                req = self._post_report(token, login, requestBody, stream=stream)
+                meta['status_code'] = req.status_code
+                meta['request_id'] = req.headers.get('RequestId')
+                meta['error'] = None
+
+                if req.status_code == 200:
+                    logger.info("Отчет для аккаунта %s создан успешно, RequestId: %s",
+                                login, meta['request_id'])
+                    if stream:
+                        return finish(self._iter_report_lines(req))
+                    self._cache_set(login, body, req.text, cache_mode)
+                    return finish(req.text)
+
+                elif req.status_code in (201, 202):
+                    retryIn = int(req.headers.get("retryIn", 60))
+                    logger.debug("Отчет для аккаунта %s %s, повторная отправка запроса через %s секунд, "
+                                 "RequestId: %s", login, OFFLINE_STATUS_MESSAGES[req.status_code],
+                                 retryIn, meta['request_id'])
+                    sleep(retryIn)
+                    queue_wait += retryIn
+
+                else:
+                    logger.warning("%s (%s), статус %s, RequestId: %s, ответ сервера: %s",
+                                   REPORT_ERROR_MESSAGES.get(req.status_code,
+                                                              "Произошла непредвиденная ошибка"),
+                                   login, req.status_code, meta['request_id'], req.text)
+                    logger.debug("JSON-код запроса для %s: %s", login, body)
+                    return finish(None)
+
+            except ConnectionError as e:
+                network_attempt += 1
+                meta['error'] = str(e)
+                logger.warning("Произошла ошибка соединения с сервером API для %s: %s", login, e)
+                if network_attempt >= max_network_retries:
+                    return finish(None)
+                sleep(2)
+
+            except Exception as e:
+                network_attempt += 1
+                meta['error'] = str(e)
+                logger.warning("Произошла непредвиденная ошибка для %s: %s", login, e)
+                if network_attempt >= max_network_retries:
+                    return finish(None)
+                sleep(2)
+
+    def _parse_report(self, login, tsv, parse):
+        """
+        Returns parse(tsv). If a streamed report breaks off while it is
+        read, the error is logged and parse("") is returned, as for a failed
+        report: a partially downloaded report is not summed.
+        """
+        try:
+            return parse(tsv)
+        except RequestException as e:
+            logger.warning("Загрузка отчета для %s прервана: %s", login, e)
+            return parse("")
+
+    def _sum_cost_from_tsv(self, tsv_text):
+        """
+        Sums the Cost column from a TSV report body (first column).
+        """
+        if self.vectorized_parsing:
+            return sum_cost_frame(report_to_dataframe(tsv_text, ["Cost"]))
+        return sum_cost_from_tsv(tsv_text)
+
+    def _parse_adnetwork_costs_from_tsv(self, tsv_text):
+        """
+        Parses TSV with columns: AdNetworkType, Cost.
+        Returns dict with summed costs per AdNetworkType.
+        """
+        if self.vectorized_parsing:
+            df = report_to_dataframe(tsv_text, ["AdNetworkType", "Cost"])
+            return group_cost_frame(df, "AdNetworkType")
+        return parse_adnetwork_costs_from_tsv(tsv_text)
+
+    def _parse_adnetwork_location_costs_from_tsv(self, tsv_text):
+        """
+        Parses TSV with columns: AdNetworkType, LocationOfPresenceId, Cost.
+        Returns dict {(AdNetworkType, LocationOfPresenceId): cost}.
+        """
+        if self.vectorized_parsing:
+            df = report_to_dataframe(tsv_text, ["AdNetworkType", "LocationOfPresenceId", "Cost"])
+            return group_location_cost_frame(df)
+        return parse_adnetwork_location_costs_from_tsv(tsv_text)
+
+    def get_report_dataframe(self, token, login, body, dtypes=None, stream=False):
+        """
+        Requests a report with arbitrary FieldNames and returns it as a typed DataFrame
+        
+        Parameters:
+            token (str): Account token
+            login (str): Account login
+            body (dict): Report request body ({"params": {...}}), Format TSV
+            dtypes (dict): Column dtypes in addition to REPORT_FIELD_DTYPES
+            stream (bool): Parse the report while it downloads; an empty
+                DataFrame is returned if the download breaks off
+            
+        Returns:
+            pandas.DataFrame: One column per FieldNames entry, "-" as NA
+        """
+        tsv = self._request_report_tsv(token, login, body, stream=stream)
+        return self._parse_report(
+            login, tsv, lambda tsv: report_to_dataframe(tsv, body["params"]["FieldNames"], dtypes))
+
+    def get_single_account_spent_by_adnetwork(self, token, login, date_range="LAST_3_DAYS",
+                                              report_suffix=None, stream=False, cache_mode=None):
+        """
+        Returns spend grouped by AdNetworkType for a single account.
+        stream: aggregate the report while it downloads instead of loading it whole;
+        if the download breaks off, costs are empty as for a failed report.
+        cache_mode: "use", "refresh" or "bypass" (see _request_report).
+        """
+        body = adnetwork_report_body(date_range, report_suffix)
+
+        tsv_text = self._request_report_tsv(token, login, body, stream=stream,
+                                            cache_mode=cache_mode)
+        costs = self._parse_report(login, tsv_text, self._parse_adnetwork_costs_from_tsv)
+        return {
+            'login': login,
+            'costs': costs
+        }
+
+    def get_single_account_spent_filtered(self, token, login, date_range="LAST_3_DAYS",
+                                          ad_network_type=None, location_ids=None, report_suffix=None,
+                                          stream=False, cache_mode=None):
+        """
+        Returns spent amount for a single account with optional filters:
+        - ad_network_type: "SEARCH" or "AD_NETWORK"
+        - location_ids: list of LocationOfPresenceId
+        - stream: sum the report while it downloads instead of loading it whole;
+          if the download breaks off, cost is 0.0 as for a failed report
+        - cache_mode: "use", "refresh" or "bypass" (see _request_report)
+        """
+        body = filtered_report_body(date_range, ad_network_type, location_ids, report_suffix)
+
+        tsv_text = self._request_report_tsv(token, login, body, stream=stream,
+                                            cache_mode=cache_mode)
+        return {
+            'login': login,
+            'cost': self._parse_report(login, tsv_text, self._sum_cost_from_tsv)
+        }
+
+    def get_multiple_accounts_spent_filtered(self, accounts_dict, date_range="LAST_3_DAYS",
+                                             ad_network_type=None, location_ids=None,
+                                             max_workers=None):
+        """
+        Returns spent amounts for multiple accounts with optional filters.
+        max_workers: if set, accounts are queried concurrently on that many threads.
+        """
+        if max_workers:
+            return self._fan_out(
+                accounts_dict,
+                lambda token, login: self.get_single_account_spent_filtered(
+                    token=token,
+                    login=login,
+                    date_range=date_range,
+                    ad_network_type=ad_network_type,
+                    location_ids=location_ids
+                ),
+                max_workers
+            )
+
+        results = []
+
+        for login, token in accounts_dict.items():
+            self.rate_limiter.acquire(token)
+            logger.info("Запрашиваю траты (filtered) для %s...", login)
+            spent = self.get_single_account_spent_filtered(
+                token=token,
+                login=login,
+                date_range=date_range,
+                ad_network_type=ad_network_type,
+                location_ids=location_ids
+            )
+
+            if spent:
+                results.append(spent)
+
+        return results
+
+    def get_geo_regions(self, token=None):
+        """
+        Returns {GeoRegionId: ParentId} from the GeoRegions dictionary.
+        The dictionary is requested once per instance.
+        """
+        if self._geo_parents is not None:
+            return self._geo_parents
+
+        headers = {
+            "Authorization": "Bearer " + (token or self.token),
+            "Accept-Language": "ru"
+        }
+        json_data = {
+            "method": "get",
+            "params": {
+                "DictionaryNames": ["GeoRegions"]
+            }
+        }
+        response = self._post("dictionaries", self.url_dictionaries, headers=headers, json=json_data)
+
+        json_data = response.json() if response.status_code == 200 else {}
+        if 'result' in json_data:
+            regions = json_data['result']['GeoRegions']
+            self._geo_parents = {region['GeoRegionId']: region.get('ParentId')
+                                 for region in regions}
+            return self._geo_parents
+        else:
+            logger.warning("Request failed with status code: %s, %s",
+                           response.status_code, response.text)
+            return None
+
+    def _reconcile_single_report(self, accounts_dict, date_range, outside_rf_location_ids,
+                                 russia_location_id, use_russia_subtract, multiplier,
+                                 use_scheduler, max_queued_per_login, cache_mode):
+        """
+        Reconciliation with one AdNetworkType x LocationOfPresenceId report
+        per account; RSYA spend is split by region using the GeoRegions tree.
+        Returns None if the GeoRegions dictionary is not available.
+        """
+        first_token = next(iter(accounts_dict.values()), None)
+        parents = self.get_geo_regions(self.token or first_token)
+        if parents is None:
+            return None
+
+        def body_for(login):
+            return adnetwork_location_report_body(date_range, report_suffix=f"{login}_ADNET_LOC")
+
+        if use_scheduler:
+            scheduler = ReportScheduler(self, max_queued_per_login=max_queued_per_login,
+                                        cache_mode=cache_mode)
+            for login, token in accounts_dict.items():
+                scheduler.add(login, token, login, body_for(login))
+            reports = scheduler.run()
+        else:
+            reports = {}
+            for login, token in accounts_dict.items():
+                self.rate_limiter.acquire(token)
+                logger.info("Сверка с комиссией для %s...", login)
+                reports[login] = self._request_report_tsv(token, login, body_for(login),
+                                                          cache_mode=cache_mode)
+
+        return [
+            reconcile_row_from_locations(
+                login,
+                self._parse_adnetwork_location_costs_from_tsv(reports.get(login)),
+                parents,
+                multiplier,
+                russia_location_id=russia_location_id,
+                outside_rf_location_ids=outside_rf_location_ids,
+                use_russia_subtract=use_russia_subtract
+            )
+            for login in accounts_dict
+        ]
+
+    def get_accounts_reconcile_with_commission(self, accounts_dict, date_range="LAST_MONTH",
+                                               outside_rf_location_ids=None,
+                                               russia_location_id=225,
+                                               use_russia_subtract=True,
+                                               commission_rate=0.03, commission_base=0.97,
+                                               use_scheduler=False,
+                                               max_queued_per_login=DEFAULT_MAX_QUEUED_PER_LOGIN,
+                                               cache_mode=None, single_report=False):
+        """
+        Returns reconciliation data per account:
+        - total_spend: all spend with VAT
+        - search_spend: spend in search (AdNetworkType=SEARCH)
+        - rsy_outside_rf_spend: spend in RSYA outside РФ
+        - excluded_sum: search_spend + rsy_outside_rf_spend
+        - commission_base_sum: total_spend - excluded_sum
+        - commission_sum: commission_base_sum * (1 + commission_rate/commission_base)
+
+        use_scheduler: submit reports of all accounts first and poll offline
+        ones together (see ReportScheduler), instead of waiting per account.
+        cache_mode: "use", "refresh" or "bypass" (see _request_report).
+        single_report: request one AdNetworkType x LocationOfPresenceId report
+        per account instead of two, and split RSYA spend by region locally
+        (regions are matched with their parents from the GeoRegions dictionary).
+        If the dictionary cannot be loaded, two reports per account are used.
+        """
+        if outside_rf_location_ids is None:
+            outside_rf_location_ids = DEFAULT_OUTSIDE_RF_LOCATION_IDS
+
+        results = []
+        multiplier = commission_multiplier(commission_rate, commission_base)
+
+        if single_report:
+            rows = self._reconcile_single_report(
+                accounts_dict, date_range, outside_rf_location_ids, russia_location_id,
+                use_russia_subtract, multiplier, use_scheduler, max_queued_per_login,
+                cache_mode
+            )
+            if rows is not None:
+                return rows
+            logger.warning("Не удалось получить справочник регионов, "
+                           "сверка выполняется по двум отчетам на аккаунт")
+
+        if use_scheduler:
+            scheduler = ReportScheduler(self, max_queued_per_login=max_queued_per_login,
+                                        cache_mode=cache_mode)
+            for login, token in accounts_dict.items():
+                scheduler.add((login, "adnetwork"), token, login, adnetwork_report_body(
+                    date_range, report_suffix=f"{login}_ADNET_GROUP"))
+                if use_russia_subtract:
+                    rsy_body = filtered_report_body(
+                        date_range, "AD_NETWORK", [russia_location_id], f"{login}_ADNET_RU")
+                else:
+                    rsy_body = filtered_report_body(
+                        date_range, "AD_NETWORK", outside_rf_location_ids, f"{login}_ADNET_OUT")
+                scheduler.add((login, "rsy"), token, login, rsy_body)
+            reports = scheduler.run()
+
+            for login in accounts_dict:
+                adnetwork_costs = self._parse_adnetwork_costs_from_tsv(reports.get((login, "adnetwork")))
+                rsy_cost = self._sum_cost_from_tsv(reports.get((login, "rsy")))
+                if use_russia_subtract:
+                    results.append(reconcile_row(login, adnetwork_costs, multiplier,
+                                                 rsy_russia_cost=rsy_cost))
+                else:
+                    results.append(reconcile_row(login, adnetwork_costs, multiplier,
+                                                 rsy_outside_cost=rsy_cost))
+            return results
+
+        for login, token in accounts_dict.items():
+            self.rate_limiter.acquire(token)
+            logger.info("Сверка с комиссией для %s...", login)
+
+            adnetwork_spend = self.get_single_account_spent_by_adnetwork(
+                token=token,
+                login=login,
+                date_range=date_range,
+                report_suffix=f"{login}_ADNET_GROUP",
+                cache_mode=cache_mode
+            )
+            adnetwork_costs = adnetwork_spend['costs'] if adnetwork_spend else {}
+
+            if use_russia_subtract:
+                rsy_russia = self.get_single_account_spent_filtered(
+                    token=token,
+                    login=login,
+                    date_range=date_range,
+                    ad_network_type="AD_NETWORK",
+                    location_ids=[russia_location_id],
+                    report_suffix=f"{login}_ADNET_RU",
+                    cache_mode=cache_mode
+                )
+                results.append(reconcile_row(
+                    login, adnetwork_costs, multiplier,
+                    rsy_russia_cost=rsy_russia['cost'] if rsy_russia else 0.0
+                ))
+            else:
+                rsy_outside_spend = self.get_single_account_spent_filtered(
+                    token=token,
+                    login=login,
+                    date_range=date_range,
+                    ad_network_type="AD_NETWORK",
+                    location_ids=outside_rf_location_ids,
+                    report_suffix=f"{login}_ADNET_OUT",
+                    cache_mode=cache_mode
+                )
+                results.append(reconcile_row(
+                    login, adnetwork_costs, multiplier,
+                    rsy_outside_cost=rsy_outside_spend['cost'] if rsy_outside_spend else 0.0
+                ))
+
+        return results
+
+
+
+    def _agency_client_spent_row(self, login, body, cache_mode=None):
+        """
+        Requests spent of one agency client with the agency token.
+        Returns dict {'login', 'cost', 'status', 'request_id'}.
+        """
+        # API ограничивает одновременные запросы и баллы, а не частоту:
+        # число запросов задает max_workers, темп - self.units
+        self.agency_rate_limiter.acquire()
+        meta = {}
+        tsv_text = self._request_report(self.token, login, body, cache_mode=cache_mode, meta=meta)
+        row = {
+            'login': login,
+            'cost': None,
+            'status': "ok",
+            'request_id': meta['request_id']
+        }
+        if tsv_text is None:
+            if meta['error'] is not None:
+                row['status'] = f"error: {meta['error']}"
+            else:
+                row['status'] = f"http_{meta['status_code']}"
+            return row
+        try:
+            row['cost'] = first_cost_from_tsv(tsv_text)
+        except ValueError as e:
+            row['status'] = f"error: {e}"
+        return row
+
+    def get_accounts_spent_table(self, logins, date_range="LAST_3_DAYS", max_workers=4,
+                                 csv_path=None, cache_mode=None):
+        """
+        Returns spent of agency clients, fetched concurrently with the agency token
+        
+        Parameters:
+            logins (list): Client logins
+            date_range (str): Date range for the report (default: "LAST_3_DAYS")
+            max_workers (int): Number of clients requested at the same time
+            csv_path (str): If set, this CSV file is overwritten and rows
+                (login,cost,status,request_id) are written to it as soon
+                as they are ready
+            cache_mode (str): "use", "refresh" or "bypass" (see _request_report)
+            
+        Returns:
+            list: Dicts {'login', 'cost', 'status', 'request_id'} in the order
+                of logins. status is "ok", "http_<code>" or "error: <text>",
+                cost is None unless status is "ok".
+        """
+        logins = list(logins)
+        body = spent_report_body(date_range)
+        rows = {}
+
+        csv_file = None
+        writer = None
+        if csv_path:
+            csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+            writer = csv.DictWriter(csv_file, fieldnames=['login', 'cost', 'status', 'request_id'])
+            writer.writeheader()
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                futures = {pool.submit(self._agency_client_spent_row, login, body, cache_mode): login
+                           for login in logins}
+                for future in as_completed(futures):
+                    login = futures[future]
+                    try:
+                        row = future.result()
+                    except Exception as e:
+                        row = {'login': login, 'cost': None,
+                               'status': f"error: {e}", 'request_id': None}
+                    rows[login] = row
+                    if writer is not None:
+                        writer.writerow(row)
+                        csv_file.flush()
+        finally:
+            if csv_file is not None:
+                csv_file.close()
+
+        return [rows[login] for login in logins]
+
+    def get_account_spent(self, logins, date_range="LAST_3_DAYS", max_workers=1):
+        """
+        Returns accounts spent as CSV text "Login,Costs"
+        Accounts whose report failed are left out (see get_accounts_spent_table).
+        """
+        rows = self.get_accounts_spent_table(logins, date_range, max_workers=max_workers)
+        lines = ["Login,Costs"]
+        for row in rows:
+            if row['status'] != "ok":
+                logger.warning("Отчет для аккаунта %s не получен: %s", row['login'], row['status'])
+                continue
+            lines.append(f"{row['login']},{row['cost']}")
+        return "\n".join(lines) + "\n"
+
+    @property
+    def spend_warehouse(self):
+        """
+        Local store of daily spend, created on first use
+        """
+        if self._spend_warehouse is None:
+            # Импорт здесь: spend_warehouse загружает pytz
+            from .spend_warehouse import SpendWarehouse
+
+            self._spend_warehouse = SpendWarehouse(self)
+        return self._spend_warehouse
+
+    def get_accounts_spent_incremental(self, accounts, date_range="LAST_3_DAYS"):
+        """
+        Returns spent of accounts from self.spend_warehouse, after loading
+        only the days it is missing (and its re-check window). Days before
+        the stored range are backfilled; a login whose range could not be
+        loaded gets an error status instead of a partial cost.
+
+        Parameters:
+            accounts (dict or list): {login: token}, or agency client
+                logins requested with the agency token.
+            date_range (str): DateRangeType resolvable to dates
+                (not ALL_TIME or AUTO).
+
+        Returns:
+            list: Dicts {'login', 'cost', 'status', 'request_id'} as in
+                get_accounts_spent_table; request_id is always None.
+        """
+        from .report_cache import resolve_report_period
+
+        warehouse = self.spend_warehouse
+        today = warehouse._today()
+        period = resolve_report_period(spent_report_body(date_range)["params"], today)
+        if period is None:
+            raise ValueError(f"Период {date_range} нельзя получить из локальных данных")
+        date_from, date_to = period
+
+        until = min(date_to, today)
+        results = warehouse.sync(accounts, until=until, since=date_from)
+        rows = []
+        for login, result in results.items():
+            if not isinstance(result, str) and not warehouse.covers(login, date_from, until):
+                result = f"период {date_from} - {until} не загружен"
+            if isinstance(result, str):
+                rows.append({'login': login, 'cost': None, 'status': f"error: {result}",
+                             'request_id': None})
+                continue
+            rows.append({'login': login, 'cost': warehouse.spent(login, date_from, date_to),
+                         'status': "ok", 'request_id': None})
+        return rows
+
+    @property
+    def campaign_cache(self):
+        """
+        Campaign metadata cache, created on first use
+        """
+        if self._campaign_cache is None:
+            self._campaign_cache = CampaignCache(self)
+        return self._campaign_cache
+
+    def get_working_campaigns(self, login, use_cache=False):
+        """
+        Returns list of names and ids of working campaigns
+        With use_cache=True they are read from self.campaign_cache,
+        in the same response shape.
+        """
+        if use_cache:
+            return {"result": {"Campaigns": [
+                {"Id": campaign['Id'], "Name": campaign['Name']}
+                for campaign in self.campaign_cache.working(login)
+            ]}}
+        token = self.token
+        headers = {
+            "Authorization": "Bearer " + token,
+            "Client-Login": login
+        }
+        json_data = {
+            "method": "get",
+            "params": {
+                "SelectionCriteria": {
+                    "States": ["ON"]
+                },
+                "FieldNames": ["Id", "Name"]
+            }
+        }
+        response = self._post("campaigns", self.url_campaigns, login, headers=headers, json=json_data)
+
+        if response.status_code == 200:
+            logger.debug("Request was successful")
+            json_data = response.json()
+            return json_data
+        else:
+            logger.warning("Request failed with status code: %s", response.status_code)
+
+    def _campaigns_request(self, login, method, campaign_ids, result_key, params=None):
+        """
+        Calls a Campaigns service method for campaign_ids, split into
+        requests of CAMPAIGN_IDS_PER_REQUEST ids.
+
+        Returns:
+            dict: Response JSON with result[result_key] lists of all
+                chunks merged, or None if the first request failed.
+                If a later chunk fails, 'error' is added next to the
+                results of the chunks that went through (they cover the
+                first len(result[result_key]) ids) and the rest is not sent.
+        """
+        headers = {
+            "Authorization": "Bearer " + self.token,
+            "Client-Login": login
+        }
+        campaign_ids = list(campaign_ids)
+        merged = None
+        for start in range(0, len(campaign_ids), CAMPAIGN_IDS_PER_REQUEST):
+            json_data = {
+                "method": method,
+                "params": dict(params or {}, SelectionCriteria={
+                    "Ids": campaign_ids[start:start + CAMPAIGN_IDS_PER_REQUEST]
+                })
+            }
+            response = self._post("campaigns", self.url_campaigns, login, headers=headers,
+                                  json=json_data)
+            if response.status_code != 200:
+                logger.warning("Request failed with status code: %s", response.status_code)
+                if merged is None:
+                    return None
+                merged['error'] = {"error_string": "Request failed",
+                                   "error_detail": f"HTTP {response.status_code}"}
+                break
+            logger.debug("Request was successful")
+            data = response.json()
+            if merged is None:
+                merged = data
+            elif 'error' in data:
+                # Результаты уже выполненных частей сохраняем вместе с ошибкой
+                merged['error'] = data['error']
+            else:
+                merged['result'][result_key].extend(data['result'][result_key])
+            if 'error' in data:
+                break
+        return merged
+
+    def suspend_campaigns(self, login, campaign_ids):
+        """
+        Suspend campaigns in Yandex Direct
+        Ids suspended without Errors are saved to the state store, also
+        when a later chunk of ids failed (the response then has 'error').
+        """
+        campaign_ids = list(campaign_ids)
+        json_data = self._campaigns_request(login, "suspend", campaign_ids, "SuspendResults")
+        if json_data is not None and 'result' in json_data:
+            # Результаты идут в порядке Ids запроса
+            suspended = [campaign_id for campaign_id, item
+                         in zip(campaign_ids, json_data['result']['SuspendResults'])
+                         if not item.get('Errors')]
+            if suspended:
+                self.state_store.save_suspended({login: suspended})
+        return json_data
+
+    def get_campaign_names(self, login, ids, use_cache=False):
+        """
+        Get names of campaigns
+        With use_cache=True names are read from self.campaign_cache
+        (in the order of ids, None for unknown ids).
+        """
+        if use_cache:
+            return self.campaign_cache.names(login, ids)
+        json_data = self._campaigns_request(login, "get", ids, "Campaigns",
+                                            {"FieldNames": ["Id", "Name"]})
+        if json_data is not None and 'error' not in json_data:
+            campaign_names = [campaign['Name'] for campaign in json_data['result']['Campaigns']]
+            return campaign_names
+        if json_data is not None:
+            logger.warning("Ошибка получения кампаний для %s: %s", login, json_data['error'])
+
+    @property
+    def state_store(self):
+        """
+        Store of suspended campaign ids, created on first use
+        """
+        if self._state_store is None:
+            # Импорт здесь: campaign_state загружает pytz
+            from .campaign_state import SQLiteCampaignStateStore
+
+            self._state_store = SQLiteCampaignStateStore(legacy_directory=".")
+        return self._state_store
+
+    def _resume_campaigns(self, login, campaign_ids):
+        return self._campaigns_request(login, "resume", campaign_ids, "ResumeResults")
+
+    @staticmethod
+    def _resumed(json_data):
+        """
+        Returns True if a resume response has no error and no item Errors
+        """
+        if json_data is None or 'error' in json_data:
+            return False
+        return not any(item.get('Errors') for item in json_data['result']['ResumeResults'])
+
+    def recover_campaigns(self, login):
+        """
+        Turn suspended campaigns back
+        The state is kept if the response has an error or item Errors.
+        """
+        state = self.state_store.load_suspended([login]).get(login)
+        if state is None:
+            logger.warning("Нет приостановленных кампаний для %s", login)
+            return None
+        json_data = self._resume_campaigns(login, state['campaign_ids'])
+        if self._resumed(json_data):
+            self.state_store.mark_recovered([login])
+        else:
+            # Состояние сохраняем, чтобы повторить восстановление
+            logger.warning("Кампании %s восстановлены не полностью: %s", login, json_data)
+        return json_data
+
+    def recover_campaigns_many(self, logins, max_workers=4):
+        """
+        Turns suspended campaigns of many logins back. Suspended ids of all
+        logins are read from the state store at once.
+
+        Logins are marked recovered only if the resume response has no
+        error and no item Errors, others keep their state for a retry.
+
+        Returns:
+            dict: {login: resume response or None}, None also for logins
+                without suspended campaigns
+        """
+        states = self.state_store.load_suspended(logins)
+        results = {login: None for login in logins}
+        items = list(states.items())
+
+        def resume(item):
+            login, state = item
+            self.agency_rate_limiter.acquire()
+            return self._resume_campaigns(login, state['campaign_ids'])
+
+        recovered = []
+        for (login, _), result in zip(items, map_concurrently(resume, items, max_workers)):
+            if isinstance(result, Exception):
+                logger.warning("Непредвиденная ошибка для %s: %s", login, result)
+                continue
+            results[login] = result
+            if self._resumed(result):
+                recovered.append(login)
+            else:
+                logger.warning("Кампании %s восстановлены не полностью: %s", login, result)
+        if recovered:
+            self.state_store.mark_recovered(recovered)
+        return results
+
+    def _campaign_action_many(self, method, campaigns_by_login, max_workers):
+        """
+        Runs suspend or resume for {login: [ids]}: ids are split into
+        requests of CAMPAIGN_IDS_PER_REQUEST, requests of all logins run
+        concurrently on max_workers threads, paced by self.units and
+        self.agency_rate_limiter.
+
+        Returns:
+            dict: {login: {campaign_id: {'ok': bool, 'errors': list,
+                'warnings': list}}}
+        """
+        result_key = f"{method.capitalize()}Results"
+        tasks = [
+            (login, ids[start:start + CAMPAIGN_IDS_PER_REQUEST])
+            for login, ids in ((login, list(ids)) for login, ids in campaigns_by_login.items())
+            for start in range(0, len(ids), CAMPAIGN_IDS_PER_REQUEST)
+        ]
+
+        def run(task):
+            login, ids = task
+            self.agency_rate_limiter.acquire()
+            return self._campaigns_request(login, method, ids, result_key)
+
+        results = {login: {} for login in campaigns_by_login}
+        for (login, ids), response in zip(tasks, map_concurrently(run, tasks, max_workers)):
+            if isinstance(response, Exception) or response is None or 'error' in response:
+                if isinstance(response, Exception):
+                    error = {"Message": str(response)}
+                elif response is None:
+                    error = {"Message": "Request failed"}
+                else:
+                    error = response['error']
+                logger.warning("Ошибка %s кампаний для %s: %s", method, login, error)
+                for campaign_id in ids:
+                    results[login][campaign_id] = {'ok': False, 'errors': [error], 'warnings': []}
+                continue
+            # Результаты идут в порядке Ids запроса
+            for campaign_id, item in zip(ids, response['result'][result_key]):
+                errors = item.get('Errors', [])
+                results[login][campaign_id] = {
+                    'ok': not errors,
+                    'errors': errors,
+                    'warnings': item.get('Warnings', [])
+                }
+        return results
+
+    def suspend_campaigns_many(self, campaigns_by_login, max_workers=8, save_state=True):
+        """
+        Suspends campaigns of many logins at once.
+
+        Parameters:
+            campaigns_by_login (dict): {login: [campaign_id, ...]}
+            max_workers (int): Concurrent requests, the session pool
+                should be at least that large.
+            save_state (bool): Record suspended ids in the state store,
+                one write for all logins, to recover them later.
+
+        Returns:
+            dict: {login: {campaign_id: {'ok', 'errors', 'warnings'}}}
+                from SuspendResults
+        """
+        results = self._campaign_action_many("suspend", campaigns_by_login, max_workers)
+        if save_state:
+            suspended = {
+                login: [campaign_id for campaign_id, result in campaigns.items() if result['ok']]
+                for login, campaigns in results.items()
+            }
+            suspended = {login: ids for login, ids in suspended.items() if ids}
+            if suspended:
+                self.state_store.save_suspended(suspended)
+        return results
+
+    def resume_campaigns_many(self, campaigns_by_login, max_workers=8):
+        """
+        Resumes campaigns of many logins at once, see suspend_campaigns_many.
+        Logins whose suspended ids in the state store were all resumed
+        without Errors are marked recovered, so recover_campaigns does not
+        resume them again.
+
+        Returns:
+            dict: {login: {campaign_id: {'ok', 'errors', 'warnings'}}}
+                from ResumeResults
+        """
+        results = self._campaign_action_many("resume", campaigns_by_login, max_workers)
+        states = self.state_store.load_suspended(list(results))
+        recovered = [
+            login for login, state in states.items()
+            if all(results[login].get(campaign_id, {}).get('ok')
+                   for campaign_id in state['campaign_ids'])
+        ]
+        if recovered:
+            self.state_store.mark_recovered(recovered)
+        return results
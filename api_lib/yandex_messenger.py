@@ -0,0 +1,264 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .files import atomic_write
+from .multipart import dataframe_csv_chunks, multipart_body, rows_csv_chunks, source_filename
+from .transport import create_session
+
+logger = logging.getLogger(__name__)
+
+
+# Yandex Messenger bot 
+class YandexMessengerBot:
+    def __init__(self, token, chat_id, session=None):
+        """
+        Initializes a new instance of the Yandex bot with the provided 
+        token and chat ID.
+
+        Parameters:
+            token (str): The token for the Yandex bot.
+            chat_id (int): The ID of the chat.
+            session (requests.Session): Optional shared session, a pooled
+                one is created if None.
+        """
+        self.token = token
+        self.session = session or create_session()
+        self.base_url = "https://botapi.messenger.yandex.net/bot/v1/messages/"
+        self.chat_id = chat_id
+
+    def send_text(self, text):
+        self.headers = {"Authorization": f"OAuth {self.token}",
+                        'Content-Type': 'application/json'}
+        url = self.base_url + "sendText/"
+        if '/' in self.chat_id:
+            data = {"chat_id": self.chat_id,
+                    "text": text}
+        else:
+            data = {"login": self.chat_id,
+                    "text": text}
+        response = self.session.post(url, headers=self.headers, json=data)
+        return response.json()
+    
+    def _recipient(self):
+        if '/' in str(self.chat_id):
+            return {"chat_id": self.chat_id}
+        return {"login": self.chat_id}
+
+    def _upload(self, method, file_field, source, filename, content_type=None, compress=None):
+        """
+        Sends source as a streaming multipart upload, the payload is never
+        held in memory whole.
+        """
+        body, multipart_type = multipart_body(self._recipient(), file_field, filename, source,
+                                              content_type, compress)
+        headers = {"Authorization": f"OAuth {self.token}",
+                   "Content-Type": multipart_type}
+        response = self.session.post(self.base_url + method, headers=headers, data=body)
+        return response.json()
+
+    def send_file(self, file_data, filename=None, compress=None, content_type="text/csv"):
+        """
+        Sends a file to the Yandex Messenger chat.
+        file_data: байтовый объект, путь к файлу, открытый файл
+                   или итератор/генератор кусков (bytes или str);
+                   строка, похожая на несуществующий путь, вызывает
+                   FileNotFoundError
+        filename: имя файла, которое увидит пользователь; по умолчанию
+                  имя файла из пути или "data.csv"
+        compress: None, "gzip" или "zip" - сжатие на лету при отправке
+        content_type: MIME-тип файла (без сжатия)
+        """
+        filename = filename or source_filename(file_data, "data.csv")
+        return self._upload("sendFile/", "document", file_data, filename,
+                            content_type, compress)
+
+    def send_table(self, table, filename="data.csv", compress=None, header=None,
+                   **to_csv_kwargs):
+        """
+        Sends a DataFrame or an iterable of rows as a CSV file, writing
+        the CSV chunk by chunk straight into the upload.
+
+        Parameters:
+            table: pandas DataFrame or iterable of rows (sequences or dicts).
+            header (list): Column names for rows without them.
+            compress (str): None, "gzip" or "zip".
+            to_csv_kwargs: Passed to DataFrame.to_csv (sep, decimal, ...).
+        """
+        if hasattr(table, "to_csv"):
+            chunks = dataframe_csv_chunks(table, **to_csv_kwargs)
+        else:
+            chunks = rows_csv_chunks(table, header=header)
+        return self.send_file(chunks, filename, compress=compress)
+    
+    def getupdate(self, offset=0, limit=None):
+        self.headers = {"Authorization": f"OAuth {self.token}"}
+        url = self.base_url + "getUpdates/"
+        params = {"offset": offset}
+        if limit:
+            params["limit"] = limit
+        response = self.session.get(url, headers=self.headers, params=params)
+        return response.json()
+    
+    def send_image(self, image_data, filename=None):
+        """
+        Отправить изображение в Yandex Messenger через sendImage.
+
+        Parameters:
+            image_data: байты изображения, путь к файлу, открытый файл
+                        или итератор кусков
+            filename (str): имя файла (например, digest.jpg); по умолчанию
+                            имя файла из пути или "digest.jpg"
+        """
+        filename = filename or source_filename(image_data, "digest.jpg")
+        return self._upload("sendImage", "image", image_data, filename)
+
+
+class UpdateDispatcher:
+    """
+    Polls getUpdates of a YandexMessengerBot and passes updates to handlers.
+
+    Polling runs in one thread on the bot's pooled session; handlers run on
+    a pool of max_workers threads, at most max_pending updates wait for a
+    worker before polling pauses. After a batch of updates the next poll is
+    sent at once, an empty answer waits idle_interval seconds. Errors are
+    retried with exponential backoff up to max_backoff seconds.
+
+    The offset (last update_id + 1) is stored in offset_path if given,
+    so a restart does not process updates again.
+
+        dispatcher = UpdateDispatcher(bot, offset_path="bot.offset")
+
+        @dispatcher.on_command("/balance")
+        def balance(update):
+            bot.send_text("...")
+
+        dispatcher.run_forever()
+    """
+    def __init__(self, bot, offset_path=None, max_workers=4, max_pending=100, limit=100,
+                 idle_interval=0.3, max_backoff=30.0):
+        """
+        Parameters:
+            bot (YandexMessengerBot): Bot to poll.
+            offset_path (str): Optional file to persist the offset in.
+            max_workers (int): Handler threads.
+            max_pending (int): Updates queued for handlers before polling waits.
+            limit (int): Max updates per getUpdates request.
+            idle_interval (float): Pause after an empty getUpdates answer, seconds.
+            max_backoff (float): Max pause after errors, seconds.
+        """
+        self.bot = bot
+        self.offset_path = offset_path
+        self.max_workers = max_workers
+        self.limit = limit
+        self.idle_interval = idle_interval
+        self.max_backoff = max_backoff
+        self.handlers = []
+        self.offset = self._load_offset()
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_handler(self, handler, predicate=None):
+        """
+        Registers handler(update), called for updates where predicate(update)
+        is true (all updates if predicate is None). The first matching
+        handler gets the update.
+        """
+        self.handlers.append((predicate, handler))
+        return handler
+
+    def on_command(self, command):
+        """
+        Decorator registering a handler for messages starting with command
+        """
+        def predicate(update):
+            text = (update.get("text") or "").strip()
+            return text == command or text.startswith(command + " ")
+
+        def decorator(handler):
+            return self.add_handler(handler, predicate)
+        return decorator
+
+    def _load_offset(self):
+        if not self.offset_path:
+            return 0
+        try:
+            with open(self.offset_path, encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _save_offset(self):
+        if not self.offset_path:
+            return
+        with atomic_write(self.offset_path) as f:
+            f.write(str(self.offset))
+
+    def _handle(self, update):
+        try:
+            for predicate, handler in self.handlers:
+                if predicate is None or predicate(update):
+                    handler(update)
+                    return
+        except Exception:
+            logger.exception("Ошибка обработчика обновления %s", update.get("update_id"))
+        finally:
+            self._pending.release()
+
+    def poll_once(self, pool):
+        """
+        Requests one batch of updates and submits them to pool.
+        Returns the number of updates received.
+        """
+        result = self.bot.getupdate(self.offset, self.limit)
+        if "updates" not in result:
+            raise RuntimeError(f"getUpdates вернул ошибку: {result}")
+        updates = result["updates"]
+        for update in updates:
+            # Ждем, пока освободится место в очереди обработчиков
+            self._pending.acquire()
+            pool.submit(self._handle, update)
+            self.offset = max(self.offset, update["update_id"] + 1)
+        if updates:
+            self._save_offset()
+        return len(updates)
+
+    def run_forever(self):
+        """
+        Polls until stop() is called, blocking the calling thread
+        """
+        backoff = 0.0
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="UpdateHandler") as pool:
+            while not self._stop.is_set():
+                try:
+                    received = self.poll_once(pool)
+                    backoff = 0.0
+                except Exception as e:
+                    backoff = min(self.max_backoff, backoff * 2 if backoff else 1.0)
+                    logger.warning("Ошибка получения обновлений: %s, повтор через %s сек.",
+                                   e, backoff)
+                    self._stop.wait(backoff)
+                    continue
+                if not received:
+                    self._stop.wait(self.idle_interval)
+
+    def start(self):
+        """
+        Starts polling in a background thread
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="UpdateDispatcher",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Stops polling and waits for running handlers
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
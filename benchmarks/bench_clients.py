@@ -0,0 +1,218 @@
+"""
+End-to-end client benchmarks against the local mock API server.
+
+Runs multi-account scenarios at several account counts and reports wall
+time, throughput (accounts per second), per-request latency p50/p99 as
+seen by the client and peak Python memory (tracemalloc). The mock server
+runs in a separate process, so its work is not measured.
+
+    python benchmarks/bench_clients.py [--accounts 10 100 1000]
+        [--latency 0.02] [--error-rate 0.01] [--offline-rate 0.2]
+        [--workers 16] [--scenario direct_spent ...] [--json out.json]
+
+Scenarios:
+    direct_spent            get_multiple_accounts_spent, thread pool
+    direct_spent_scheduler  get_multiple_accounts_spent, use_scheduler=True
+    direct_reconcile        get_accounts_reconcile_with_commission,
+                            single report per account, scheduler
+    agency_spent            get_account_spent with the agency token
+    vk_stats                get_spent_vk_frame, 31 days per account
+    telegram_queue          TelegramSendQueue, one message per account
+    messenger_send_text     YandexMessengerBot.send_text, thread pool
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api_lib import TelegramBot, TelegramSendQueue, YandexDirect, YandexMessengerBot  # noqa: E402
+from api_lib.concurrency import map_concurrently  # noqa: E402
+from api_lib.instrumentation import CallbackInstrumentation  # noqa: E402
+from api_lib.vk_ads import get_spent_vk_frame  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_server import mock_session  # noqa: E402
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(share * (len(values) - 1))))]
+
+
+def timed(latencies, func):
+    """
+    Wraps func so that the duration of every call is appended to latencies
+    """
+    def wrapper(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append(perf_counter() - started)
+    return wrapper
+
+
+def direct_client(url, workers, latencies):
+    instrumentation = CallbackInstrumentation(on_request=lambda event: latencies.append(event.latency))
+    return YandexDirect("agency-token", session=mock_session(url, pool_maxsize=workers),
+                        instrumentation=instrumentation)
+
+
+def accounts(n):
+    return {f"client-{i:05d}": f"token-{i:05d}" for i in range(n)}
+
+
+def run_direct_spent(url, n, workers, latencies):
+    client = direct_client(url, workers, latencies)
+    return len(client.get_multiple_accounts_spent(accounts(n), max_workers=workers))
+
+
+def run_direct_spent_scheduler(url, n, workers, latencies):
+    client = direct_client(url, workers, latencies)
+    return len(client.get_multiple_accounts_spent(accounts(n), use_scheduler=True))
+
+
+def run_direct_reconcile(url, n, workers, latencies):
+    client = direct_client(url, workers, latencies)
+    return len(client.get_accounts_reconcile_with_commission(
+        accounts(n), use_scheduler=True, single_report=True))
+
+
+def run_agency_spent(url, n, workers, latencies):
+    client = direct_client(url, workers, latencies)
+    csv_text = client.get_account_spent(list(accounts(n)), max_workers=workers)
+    return csv_text.count("\n") - 1
+
+
+def run_vk_stats(url, n, workers, latencies):
+    from api_lib import vk_ads
+
+    session = mock_session(url, pool_maxsize=workers)
+    original = vk_ads._get_with_token
+    vk_ads._get_with_token = timed(latencies, original)
+    try:
+        df = get_spent_vk_frame(list(range(1, n + 1)), "vk-token", "2024-01-01", "2024-01-31",
+                                max_workers=workers, requests_per_second=0, session=session)
+    finally:
+        vk_ads._get_with_token = original
+    return df["id"].nunique()
+
+
+def run_telegram_queue(url, n, workers, latencies):
+    bot = TelegramBot("tg-token", chat_id=1, session=mock_session(url, pool_maxsize=1))
+    bot.send_message = timed(latencies, bot.send_message)
+    with TelegramSendQueue(bot, maxsize=n + 1, per_chat_rate=0, global_rate=0) as sender:
+        futures = [sender.send(f"alert {i}", chat_id=i + 1) for i in range(n)]
+    return sum(1 for future in futures if future.result().get("ok"))
+
+
+def run_messenger_send_text(url, n, workers, latencies):
+    bot = YandexMessengerBot("ym-token", "user@example.com",
+                             session=mock_session(url, pool_maxsize=workers))
+    send = timed(latencies, bot.send_text)
+    results = map_concurrently(lambda i: send(f"alert {i}"), range(n), workers)
+    return sum(1 for result in results if isinstance(result, dict) and result.get("ok"))
+
+
+SCENARIOS = {
+    "direct_spent": run_direct_spent,
+    "direct_spent_scheduler": run_direct_spent_scheduler,
+    "direct_reconcile": run_direct_reconcile,
+    "agency_spent": run_agency_spent,
+    "vk_stats": run_vk_stats,
+    "telegram_queue": run_telegram_queue,
+    "messenger_send_text": run_messenger_send_text,
+}
+
+
+def start_server(args):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            "mock_server.py"),
+               "--latency", str(args.latency), "--error-rate", str(args.error_rate),
+               "--offline-rate", str(args.offline_rate), "--retry-in", str(args.retry_in)]
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env)
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise RuntimeError("mock server did not start")
+    return process, url
+
+
+def run(name, url, n, workers):
+    latencies = []
+    tracemalloc.start()
+    started = perf_counter()
+    try:
+        done = SCENARIOS[name](url, n, workers, latencies)
+    finally:
+        wall = perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {
+        "scenario": name,
+        "accounts": n,
+        "done": done,
+        "wall_s": wall,
+        "accounts_per_s": n / wall if wall else None,
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+        "peak_mib": peak / 2 ** 20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--accounts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--scenario", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="server delay per request, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.01,
+                        help="share of reports answered 400/500/502")
+    parser.add_argument("--offline-rate", type=float, default=0.2,
+                        help="share of reports answered 201/202 first")
+    parser.add_argument("--retry-in", type=int, default=0,
+                        help="retryIn of 201/202 answers, seconds")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    # Ошибки 400/500/502 ожидаемы, в выводе бенчмарка они не нужны
+    logging.disable(logging.WARNING)
+    # pandas импортируется лениво; грузим заранее, чтобы импорт не попал в замеры
+    import pandas  # noqa: F401
+    process, url = start_server(args)
+    results = []
+    try:
+        print(f"{'scenario':<24}{'accounts':>9}{'done':>7}{'wall s':>9}{'acc/s':>9}"
+              f"{'requests':>10}{'p50 ms':>9}{'p99 ms':>9}{'peak MiB':>10}")
+        for name in args.scenario:
+            for n in args.accounts:
+                result = run(name, url, n, args.workers)
+                results.append(result)
+                print(f"{name:<24}{n:>9}{result['done']:>7}{result['wall_s']:>9.2f}"
+                      f"{result['accounts_per_s']:>9.1f}{result['requests']:>10}"
+                      f"{result['p50_ms'] or 0:>9.1f}{result['p99_ms'] or 0:>9.1f}"
+                      f"{result['peak_mib']:>10.2f}", flush=True)
+    finally:
+        process.terminate()
+        process.wait()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold import time of api_lib entry points.
+
+Every case runs in a fresh interpreter, so nothing is cached in
+sys.modules. Reports the median wall time over several runs and which
+heavy dependencies got loaded.
+
+    python benchmarks/bench_import.py [--runs 7] [--max-ms 150]
+
+With --max-ms the script exits with status 1 if a case that must stay
+light (no pandas) is slower than the budget.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "pytz", "requests", "aiohttp"]
+
+# (label, statement, must stay without pandas)
+CASES = [
+    ("import api_lib", "import api_lib", True),
+    ("telegram", "from api_lib import TelegramBot", True),
+    ("yandex messenger", "from api_lib import YandexMessengerBot", True),
+    ("vk ads", "from api_lib import get_balance_vk_accs", True),
+    ("api_functions.TelegramBot", "from api_lib.api_functions import TelegramBot", True),
+    ("yandex direct", "from api_lib import YandexDirect", True),
+    ("pandas (reference)", "import pandas", False),
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000,
+                  "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement, runs):
+    timings = []
+    loaded = []
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    code = PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out)
+        timings.append(result["ms"])
+        loaded = result["loaded"]
+    return statistics.median(timings), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'case':<28}{'median ms':>12}  loaded")
+    for label, statement, light in CASES:
+        try:
+            ms, loaded = measure(statement, args.runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{label:<28}{'-':>12}  failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        marks = []
+        if light and "pandas" in loaded:
+            marks.append("pandas loaded")
+            failed = True
+        if light and args.max_ms is not None and ms > args.max_ms:
+            marks.append(f"over {args.max_ms:g} ms")
+            failed = True
+        print(f"{label:<28}{ms:>12.1f}  {', '.join(loaded) or '-'}"
+              + (f"  <-- {'; '.join(marks)}" if marks else ""))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmarks of the report parsing paths of YandexDirect.
+
+Every parser runs on synthetic TSV bodies (see tsv_corpus.py) of each
+size; reported are rows per second (best of --repeat runs) and peak
+memory allocated during one run (tracemalloc, measured in a separate
+run so it does not slow the timing). Results of the loop and the
+vectorized path of the same report are compared.
+
+    python benchmarks/bench_parsers.py [--rows 1000 100000 1000000]
+        [--repeat 3] [--parser sum_cost_loop ...] [--json out.json]
+
+10M-row corpora take several GB of memory with the pandas paths.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api_lib import YandexDirect  # noqa: E402
+from api_lib.direct_reports import (  # noqa: E402
+    group_cost_frame,
+    group_location_cost_frame,
+    parse_adnetwork_costs_from_tsv,
+    parse_adnetwork_location_costs_from_tsv,
+    report_to_dataframe,
+    sum_cost_frame,
+    sum_cost_from_tsv,
+)
+from tsv_corpus import REPORT_SHAPES, make_corpus  # noqa: E402
+
+LOOP_CLIENT = YandexDirect("token", vectorized_parsing=False)
+VECTORIZED_CLIENT = YandexDirect("token", vectorized_parsing=True)
+
+
+def location_costs_frame(tsv):
+    df = report_to_dataframe(tsv, REPORT_SHAPES["adnetwork_location"])
+    return group_location_cost_frame(df)
+
+
+# name: (report shape, function of the TSV text, comparison group)
+PARSERS = {
+    "sum_cost_loop": ("spent", sum_cost_from_tsv, "sum_cost"),
+    "sum_cost_frame": ("spent", lambda tsv: sum_cost_frame(
+        report_to_dataframe(tsv, REPORT_SHAPES["spent"])), "sum_cost"),
+    "sum_cost_stream": ("spent", lambda tsv: sum_cost_from_tsv(iter(tsv.splitlines(True))),
+                        "sum_cost"),
+    "client_sum_cost": ("spent", LOOP_CLIENT._sum_cost_from_tsv, "sum_cost"),
+    "client_sum_cost_vectorized": ("spent", VECTORIZED_CLIENT._sum_cost_from_tsv, "sum_cost"),
+    "adnetwork_loop": ("adnetwork", parse_adnetwork_costs_from_tsv, "adnetwork"),
+    "adnetwork_frame": ("adnetwork", lambda tsv: group_cost_frame(
+        report_to_dataframe(tsv, REPORT_SHAPES["adnetwork"]), "AdNetworkType"), "adnetwork"),
+    "client_adnetwork": ("adnetwork", LOOP_CLIENT._parse_adnetwork_costs_from_tsv, "adnetwork"),
+    "client_adnetwork_vectorized": ("adnetwork",
+                                    VECTORIZED_CLIENT._parse_adnetwork_costs_from_tsv,
+                                    "adnetwork"),
+    "location_loop": ("adnetwork_location", parse_adnetwork_location_costs_from_tsv,
+                      "location"),
+    "location_frame": ("adnetwork_location", location_costs_frame, "location"),
+    "client_location": ("adnetwork_location",
+                        LOOP_CLIENT._parse_adnetwork_location_costs_from_tsv, "location"),
+    "client_location_vectorized": ("adnetwork_location",
+                                   VECTORIZED_CLIENT._parse_adnetwork_location_costs_from_tsv,
+                                   "location"),
+}
+
+
+def total(result):
+    if isinstance(result, dict):
+        return sum(value for value in result.values()
+                   if not (isinstance(value, float) and math.isnan(value)))
+    return result
+
+
+def measure(func, tsv, repeat):
+    best = None
+    for _ in range(repeat):
+        started = perf_counter()
+        result = func(tsv)
+        elapsed = perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func(tsv)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--parser", nargs="+", choices=list(PARSERS), default=list(PARSERS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    import pandas  # noqa: F401  - импорт не должен попасть в замеры
+
+    results = []
+    mismatches = []
+    print(f"{'parser':<30}{'rows':>10}{'best s':>10}{'rows/s':>14}{'peak MiB':>10}{'total':>18}")
+    for rows in args.rows:
+        corpora = {}
+        totals = {}
+        for name in args.parser:
+            shape, func, group = PARSERS[name]
+            if shape not in corpora:
+                corpora[shape] = make_corpus(REPORT_SHAPES[shape], rows)
+            best, peak, result = measure(func, corpora[shape], args.repeat)
+            value = total(result)
+            results.append({"parser": name, "rows": rows, "best_s": best,
+                            "rows_per_s": rows / best if best else None,
+                            "peak_mib": peak / 2 ** 20, "total": value})
+            print(f"{name:<30}{rows:>10}{best:>10.4f}{rows / best:>14,.0f}"
+                  f"{peak / 2 ** 20:>10.2f}{value:>18.2f}", flush=True)
+            if group in totals and not math.isclose(totals[group][1], value, rel_tol=1e-9):
+                mismatches.append(f"{name} != {totals[group][0]} at {rows} rows: "
+                                  f"{value} vs {totals[group][1]}")
+            totals.setdefault(group, (name, value))
+        corpora.clear()
+
+    for mismatch in mismatches:
+        print("MISMATCH:", mismatch)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
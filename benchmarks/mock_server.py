@@ -0,0 +1,351 @@
+"""
+Local stand-in for the HTTP APIs used by api_lib, for benchmarks.
+
+Emulates:
+    POST /json/v5/reports          TSV reports; 201/202 with retryIn,
+                                   400/500/502 by error rate
+    POST /json/v5/campaigns        get (paged), suspend, resume
+    POST /json/v5/changes          checkDictionaries, checkCampaigns
+    POST /json/v5/dictionaries     GeoRegions
+    GET  /api/v2/statistics/users/day.json   VK Ads daily statistics
+    GET  /api/v2/agency/clients.json         VK Ads agency clients (paged)
+    POST /bot<token>/sendMessage             Telegram
+    POST /bot/v1/messages/sendText/, sendFile/, sendImage   Yandex Messenger
+
+Every JSON v5 response carries Units and Units-Used-Login headers.
+Clients are pointed at the server with mock_session(), which rewrites
+the scheme and host of every request, so no URL in api_lib changes.
+
+    server = MockServer(latency=0.01, error_rate=0.01, offline_rate=0.2)
+    server.start()
+    client = YandexDirect("token", session=mock_session(server.url))
+"""
+import json
+import random
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from requests.adapters import HTTPAdapter
+
+from api_lib.transport import PooledSession
+
+# Небольшое дерево регионов: Россия с Москвой, Беларусь и Казахстан
+GEO_REGIONS = [
+    {"GeoRegionId": 225, "ParentId": 10001, "GeoRegionName": "Россия"},
+    {"GeoRegionId": 213, "ParentId": 225, "GeoRegionName": "Москва"},
+    {"GeoRegionId": 149, "ParentId": 10002, "GeoRegionName": "Беларусь"},
+    {"GeoRegionId": 159, "ParentId": 10002, "GeoRegionName": "Казахстан"},
+    {"GeoRegionId": 10001, "ParentId": 0, "GeoRegionName": "Евразия"},
+    {"GeoRegionId": 10002, "ParentId": 0, "GeoRegionName": "СНГ"},
+]
+
+UNITS_DAILY_LIMIT = 64000
+
+
+class MockState:
+    """
+    Counters and per-login state shared by request handlers
+    """
+    def __init__(self, latency, error_rate, offline_rate, retry_in, rows_per_report,
+                 campaigns_per_login, vk_clients, seed):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.offline_rate = offline_rate
+        self.retry_in = retry_in
+        self.rows_per_report = rows_per_report
+        self.campaigns_per_login = campaigns_per_login
+        self.vk_clients = vk_clients
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.offline = {}
+        self.units_rest = {}
+        self.request_id = 0
+
+    def count(self, path):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+            self.request_id += 1
+            return str(self.request_id)
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def units(self, login, cost):
+        with self.lock:
+            rest = max(0, self.units_rest.get(login, UNITS_DAILY_LIMIT) - cost)
+            self.units_rest[login] = rest
+            return f"{cost}/{rest}/{UNITS_DAILY_LIMIT}"
+
+    def offline_polls(self, key):
+        """
+        Returns how many more 201/202 answers a report gets; the first
+        request decides whether the report goes offline at all
+        """
+        with self.lock:
+            if key not in self.offline:
+                self.offline[key] = (self.random.randint(1, 3)
+                                     if self.random.random() < self.offline_rate else 0)
+            left = self.offline[key]
+            if left:
+                self.offline[key] = left - 1
+            return left
+
+
+def _report_tsv(field_names, rows, seed):
+    rnd = random.Random(seed)
+    lines = []
+    for i in range(rows):
+        values = []
+        for name in field_names:
+            if name == "Cost":
+                values.append(f"{rnd.uniform(10, 5000):.2f}")
+            elif name == "AdNetworkType":
+                values.append("SEARCH" if i % 2 else "AD_NETWORK")
+            elif name == "LocationOfPresenceId":
+                values.append(str(rnd.choice([213, 225, 149, 159])))
+            elif name == "Date":
+                values.append((date(2024, 1, 1) + timedelta(days=i % 365)).isoformat())
+            else:
+                values.append(str(rnd.randint(0, 1000)))
+        lines.append("\t".join(values))
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Заголовки и тело пишутся отдельно, без TCP_NODELAY ответ ждет delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            return self.rfile.read(length)
+        if self.headers.get("Transfer-Encoding") == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        return b""
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, ensure_ascii=False)
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method):
+        path = urlsplit(self.path).path
+        request_id = self.state.count(path)
+        if self.state.latency:
+            sleep(self.state.latency)
+        body = self._body() if method == "POST" else b""
+        login = self.headers.get("Client-Login") or "agency"
+        headers = {"RequestId": request_id}
+
+        if path.startswith("/json/v5/"):
+            data = json.loads(body)
+            # Отчеты баллов не тратят, но заголовок Units приходит и для них
+            headers["Units"] = self.state.units(login, 0 if path.endswith("/reports") else 10)
+            headers["Units-Used-Login"] = login
+        if path == "/json/v5/reports":
+            return self._reports(data, login, headers)
+        if path.startswith("/json/v5/"):
+            service = path[len("/json/v5/"):]
+            handler = getattr(self, f"_{service}", None)
+            if handler is None:
+                return self._send(404, {"error": {"error_code": 1000, "error_string": path}})
+            return self._send(200, handler(data, login), headers=headers)
+        if path == "/api/v2/statistics/users/day.json":
+            return self._send(200, self._vk_stats(parse_qs(urlsplit(self.path).query)))
+        if path == "/api/v2/agency/clients.json":
+            return self._send(200, self._vk_clients(parse_qs(urlsplit(self.path).query)))
+        if path.startswith("/bot"):
+            return self._send(200, {"ok": True, "result": {"message_id": int(request_id)}})
+        return self._send(404, {"error": path})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def _reports(self, data, login, headers):
+        params = data["params"]
+        if self.state.roll(self.state.error_rate):
+            status = self.state.random.choice([400, 500, 502])
+            return self._send(status, {"error": {"error_code": 8000 + status,
+                                                 "error_string": "mock error"}},
+                              headers=headers)
+        key = (login, params.get("ReportName"))
+        if self.state.offline_polls(key):
+            headers["retryIn"] = str(self.state.retry_in)
+            headers["reportsInQueue"] = "1"
+            status = self.state.random.choice([201, 202])
+            return self._send(status, "", content_type="text/plain", headers=headers)
+        rows = 1 if params["FieldNames"] == ["Cost"] else self.state.rows_per_report
+        tsv = _report_tsv(params["FieldNames"], rows, f"{login}/{params.get('ReportName')}")
+        return self._send(200, tsv, content_type="text/tab-separated-values", headers=headers)
+
+    def _campaign(self, login, campaign_id):
+        return {"Id": campaign_id, "Name": f"{login} campaign {campaign_id}",
+                "State": "ON" if campaign_id % 3 else "SUSPENDED", "Status": "ACCEPTED"}
+
+    def _campaigns(self, data, login):
+        method, params = data["method"], data["params"]
+        ids = params.get("SelectionCriteria", {}).get("Ids")
+        if method == "get":
+            if ids is None:
+                page = params.get("Page", {})
+                offset, limit = page.get("Offset", 0), page.get("Limit", 10000)
+                ids = range(offset + 1, min(offset + limit, self.state.campaigns_per_login) + 1)
+                result = {"Campaigns": [self._campaign(login, i) for i in ids]}
+                if offset + limit < self.state.campaigns_per_login:
+                    result["LimitedBy"] = offset + limit
+                return {"result": result}
+            return {"result": {"Campaigns": [self._campaign(login, i) for i in ids]}}
+        results = [{"Id": i} if i % 50 else {"Errors": [{"Code": 8300, "Message": "mock"}]}
+                   for i in ids]
+        return {"result": {f"{method.capitalize()}Results": results}}
+
+    def _changes(self, data, login):
+        if data["method"] == "checkDictionaries":
+            return {"result": {"Timestamp": "2024-01-01T00:00:00Z"}}
+        changed = [{"CampaignId": i, "ChangesIn": ["SELF"]} for i in range(1, 4)]
+        return {"result": {"Timestamp": "2024-01-01T01:00:00Z", "Campaigns": changed}}
+
+    def _dictionaries(self, data, login):
+        return {"result": {"GeoRegions": GEO_REGIONS}}
+
+    def _vk_stats(self, query):
+        ids = query["id"][0].split(",")
+        date_from = date.fromisoformat(query["date_from"][0])
+        date_to = date.fromisoformat(query["date_to"][0])
+        days = (date_to - date_from).days + 1
+        items = []
+        for account_id in ids:
+            rows = [{"date": (date_from + timedelta(days=i)).isoformat(),
+                     "base": {"shows": 1000 + i, "clicks": 10 + i % 7, "spent": f"{100 + i:.2f}"}}
+                    for i in range(days)]
+            items.append({"id": int(account_id), "rows": rows})
+        return {"items": items}
+
+    def _vk_clients(self, query):
+        total = self.state.vk_clients
+        offset = int(query.get("offset", ["0"])[0])
+        limit = int(query.get("limit", ["20"])[0])
+        items = [{"user": {"id": i, "additional_info": {"client_name": f"client {i}"},
+                           "account": {"balance": f"{i * 10}.00"}}}
+                 for i in range(offset, min(offset + limit, total))]
+        return {"count": total, "offset": offset, "items": items}
+
+
+class MockServer:
+    """
+    Threaded mock API server on 127.0.0.1, see module docstring.
+
+    Parameters:
+        latency (float): Delay before every answer, seconds.
+        error_rate (float): Share of report requests answered 400/500/502.
+        offline_rate (float): Share of reports answered 201/202 1-3 times first.
+        retry_in (int): retryIn header of 201/202 answers, seconds.
+        rows_per_report (int): Rows of grouped reports.
+        campaigns_per_login (int): Campaigns returned by campaigns.get.
+        vk_clients (int): Clients listed by agency/clients.json.
+    """
+    def __init__(self, latency=0.0, error_rate=0.0, offline_rate=0.0, retry_in=0,
+                 rows_per_report=20, campaigns_per_login=50, vk_clients=120, seed=1):
+        self.state = MockState(latency, error_rate, offline_rate, retry_in, rows_per_report,
+                               campaigns_per_login, vk_clients, seed)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.request_queue_size = 256
+        self.httpd.state = self.state
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class _RedirectSession(PooledSession):
+    def __init__(self, mock_url):
+        super().__init__()
+        self.mock_url = mock_url
+
+    def request(self, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        base = urlsplit(self.mock_url)
+        url = urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+        return super().request(method, url, *args, **kwargs)
+
+
+def mock_session(mock_url, pool_maxsize=32):
+    """
+    Returns a pooled session sending every request to mock_url
+    (same path and query, scheme and host replaced)
+    """
+    session = _RedirectSession(mock_url)
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize))
+    return session
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--offline-rate", type=float, default=0.0)
+    parser.add_argument("--retry-in", type=int, default=0)
+    parser.add_argument("--rows-per-report", type=int, default=20)
+    parser.add_argument("--campaigns-per-login", type=int, default=50)
+    parser.add_argument("--vk-clients", type=int, default=120)
+    args = parser.parse_args()
+
+    server = MockServer(args.latency, args.error_rate, args.offline_rate, args.retry_in,
+                        args.rows_per_report, args.campaigns_per_login, args.vk_clients)
+    # Первая строка вывода - адрес сервера, ее читает bench_clients.py
+    print(server.url, flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Synthetic Yandex Direct TSV report bodies for parser benchmarks.
+
+Bodies look like reports requested with skipReportHeader,
+skipColumnHeader and skipReportSummary: one row per line, tab separated,
+"-" for missing values. A share of lines is blank or malformed (a cost
+that is not a number, or a row cut short) to exercise the skip paths.
+
+    python benchmarks/tsv_corpus.py --rows 10000000 --fields AdNetworkType Cost \
+        --out corpus.tsv
+"""
+import argparse
+import random
+
+AD_NETWORK_TYPES = ["SEARCH", "AD_NETWORK"]
+LOCATION_IDS = [213, 2, 225, 149, 159, 187, 983, 10002]
+
+REPORT_SHAPES = {
+    "spent": ["Cost"],
+    "adnetwork": ["AdNetworkType", "Cost"],
+    "adnetwork_location": ["AdNetworkType", "LocationOfPresenceId", "Cost"],
+}
+
+
+def _value(name, rnd):
+    if name == "Cost":
+        return f"{rnd.uniform(0, 10000):.2f}"
+    if name == "AdNetworkType":
+        return rnd.choice(AD_NETWORK_TYPES)
+    if name == "LocationOfPresenceId":
+        return str(rnd.choice(LOCATION_IDS))
+    return str(rnd.randint(0, 100000))
+
+
+def iter_corpus_lines(field_names, rows, dash_rate=0.02, blank_rate=0.001,
+                      malformed_rate=0.001, seed=0):
+    """
+    Yields rows lines (with "\\n") of a synthetic report with field_names
+    """
+    rnd = random.Random(seed)
+    cost_index = field_names.index("Cost") if "Cost" in field_names else None
+    for _ in range(rows):
+        roll = rnd.random()
+        if roll < blank_rate:
+            yield "\n"
+            continue
+        values = [_value(name, rnd) for name in field_names]
+        if roll < blank_rate + malformed_rate:
+            if cost_index is not None and (len(values) == 1 or rnd.random() < 0.5):
+                values[cost_index] = "n/a"
+            else:
+                values = values[:-1]
+        elif cost_index is not None and rnd.random() < dash_rate:
+            values[cost_index] = "-"
+        yield "\t".join(values) + "\n"
+
+
+def make_corpus(field_names, rows, **kwargs):
+    """
+    Returns a synthetic report body as one string
+    """
+    return "".join(iter_corpus_lines(field_names, rows, **kwargs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--fields", nargs="+", default=REPORT_SHAPES["adnetwork"])
+    parser.add_argument("--dash-rate", type=float, default=0.02)
+    parser.add_argument("--blank-rate", type=float, default=0.001)
+    parser.add_argument("--malformed-rate", type=float, default=0.001)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    with open(args.out, "w", encoding="utf-8", newline="") as f:
+        batch = []
+        for line in iter_corpus_lines(args.fields, args.rows, args.dash_rate, args.blank_rate,
+                                      args.malformed_rate, args.seed):
+            batch.append(line)
+            if len(batch) == 100000:
+                f.write("".join(batch))
+                batch = []
+        f.write("".join(batch))
+
+
+if __name__ == "__main__":
+    main()
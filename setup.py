@@ -7,5 +7,10 @@ setup(
     install_requires=[
         "requests",  # <- в кавычках
         "pytz",      # <- в кавычках
-    ]
+        "pandas",
+    ],
+    extras_require={
+        "async": ["aiohttp"],
+        "warehouse": ["pyarrow"],
+    }
 )
\ No newline at end of file
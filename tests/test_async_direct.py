@@ -0,0 +1,71 @@
+import asyncio
+import json
+from time import perf_counter
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from api_lib import AsyncYandexDirect  # noqa: E402
+
+
+class StubResponse:
+    def __init__(self, status, text, headers):
+        self.status = status
+        self.text = text
+        self.headers = headers
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        return self.text.encode("utf-8")
+
+
+class StubSession:
+    """
+    Reports API: every report is queued (201, retryIn 1) on its first
+    request and ready on the next one. Tracks requests in flight.
+    """
+    def __init__(self):
+        self.seen = set()
+        self.in_flight = {}
+        self.max_in_flight = {}
+
+    def post(self, url, data=None, headers=None):
+        login = headers["Client-Login"]
+        name = (login, json.loads(data)["params"]["ReportName"])
+        if name in self.seen:
+            self.in_flight[login] -= 1
+            return StubResponse(200, "1.0\n", {})
+        self.seen.add(name)
+        self.in_flight[login] = self.in_flight.get(login, 0) + 1
+        self.max_in_flight[login] = max(self.max_in_flight.get(login, 0), self.in_flight[login])
+        return StubResponse(201, "", {"retryIn": "1"})
+
+
+def test_offline_reports_wait_without_holding_request_slots():
+    session = StubSession()
+    client = AsyncYandexDirect("token", session=session, max_concurrency=5)
+    accounts = {f"login-{i}": "token" for i in range(100)}
+
+    started = perf_counter()
+    rows = asyncio.run(client.get_multiple_accounts_spent(accounts))
+
+    assert len(rows) == 100
+    # 100 отчетов ждут retryIn одновременно, а не по 5
+    assert perf_counter() - started < 5
+
+
+def test_reports_in_flight_per_login_are_limited():
+    session = StubSession()
+    client = AsyncYandexDirect("token", session=session, max_queued_per_login=1)
+
+    rows = asyncio.run(client.get_accounts_reconcile_with_commission({"a": "token"}))
+
+    assert len(rows) == 1
+    assert session.max_in_flight == {"a": 1}
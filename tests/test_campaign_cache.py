@@ -0,0 +1,63 @@
+from api_lib import CampaignCache
+
+
+class StubClient:
+    pass
+
+
+class StubCache(CampaignCache):
+    """
+    Serves one stored campaign and evicts the login when its lock is taken
+    """
+    def _login_lock(self, login):
+        self.invalidate(login)
+        return super()._login_lock(login)
+
+    def _full_sync(self, login):
+        return {"timestamp": "t", "synced": 0.0,
+                "campaigns": {1: {"Id": 1, "Name": "first"}}}
+
+    def _fetch_ids(self, login, ids):
+        return [{"Id": campaign_id, "Name": f"name {campaign_id}"} for campaign_id in ids
+                if campaign_id != 3]
+
+
+def test_names_when_login_is_evicted():
+    cache = StubCache(StubClient(), max_age=None)
+
+    assert cache.names("a", [1, 2, 3]) == ["first", "name 2", None]
+
+
+class CountingCache(CampaignCache):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched = []
+        self.syncs = 0
+
+    def _full_sync(self, login):
+        self.syncs += 1
+        return {"timestamp": "t", "synced": 0.0,
+                "campaigns": {1: {"Id": 1, "Name": "first"}}}
+
+    def _incremental_sync(self, login, entry):
+        return self._full_sync(login)
+
+    def _fetch_ids(self, login, ids):
+        self.fetched.append(list(ids))
+        return [{"Id": 2, "Name": "second"}] if 2 in ids else []
+
+
+def test_unknown_ids_are_requested_once_until_refresh(tmp_path):
+    cache = CountingCache(StubClient(), max_age=None, directory=str(tmp_path))
+
+    assert cache.names("a", [1, 2, 3, 3]) == ["first", "second", None, None]
+    assert cache.names("a", [3, 2]) == [None, "second"]
+    assert cache.fetched == [[2, 3]]
+
+    cache.invalidate("a")
+    assert cache.names("a", [3]) == [None]
+    assert cache.fetched == [[2, 3]]
+
+    cache.refresh("a")
+    assert cache.names("a", [3]) == [None]
+    assert cache.fetched == [[2, 3], [3]]
@@ -0,0 +1,126 @@
+import json
+
+from api_lib import SQLiteCampaignStateStore, YandexDirect
+
+
+class StubResponse:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.content = json.dumps(data).encode("utf-8")
+        self.headers = {}
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class StubSession:
+    """
+    Answers Campaigns requests with handler(method, ids) and records them
+    """
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = []
+
+    def post(self, url, stream=False, json=None, **kwargs):
+        ids = json["params"]["SelectionCriteria"]["Ids"]
+        self.calls.append((json["method"], ids))
+        return StubResponse(self.handler(json["method"], ids))
+
+
+def make_client(tmp_path, handler):
+    session = StubSession(handler)
+    store = SQLiteCampaignStateStore(str(tmp_path / "state.sqlite3"))
+    return YandexDirect("token", session=session, state_store=store), session
+
+
+def ok_results(method, ids):
+    key = f"{method.capitalize()}Results"
+    return {"result": {key: [{"Id": campaign_id} for campaign_id in ids]}}
+
+
+def test_suspend_saves_chunks_done_before_failure(tmp_path):
+    def handler(method, ids):
+        if ids[0] >= 1000:
+            return {"error": {"error_code": 53, "error_string": "Authorization error"}}
+        return ok_results(method, ids)
+
+    client, session = make_client(tmp_path, handler)
+    result = client.suspend_campaigns("a", list(range(1500)))
+
+    assert len(session.calls) == 2
+    assert result["error"]["error_code"] == 53
+    assert len(result["result"]["SuspendResults"]) == 1000
+    state = client.state_store.load_suspended(["a"])["a"]
+    assert state["campaign_ids"] == list(range(1000))
+
+
+def test_suspend_skips_ids_with_errors(tmp_path):
+    def handler(method, ids):
+        return {"result": {"SuspendResults": [
+            {"Id": 1}, {"Errors": [{"Code": 8800, "Message": "Not found"}]}, {"Id": 3}
+        ]}}
+
+    client, _ = make_client(tmp_path, handler)
+    client.suspend_campaigns("a", [1, 2, 3])
+
+    assert client.state_store.load_suspended(["a"])["a"]["campaign_ids"] == [1, 3]
+
+
+def test_recover_keeps_state_on_error(tmp_path):
+    def handler(method, ids):
+        if method == "resume":
+            return {"error": {"error_code": 53, "error_string": "Authorization error"}}
+        return ok_results(method, ids)
+
+    client, _ = make_client(tmp_path, handler)
+    client.suspend_campaigns("a", [1, 2])
+
+    assert "error" in client.recover_campaigns("a")
+    assert client.recover_campaigns_many(["a"])["a"]["error"]["error_code"] == 53
+    assert client.state_store.load_suspended(["a"])["a"]["campaign_ids"] == [1, 2]
+
+
+def test_recover_keeps_state_on_item_errors(tmp_path):
+    def handler(method, ids):
+        if method == "resume":
+            return {"result": {"ResumeResults": [
+                {"Id": 1}, {"Errors": [{"Code": 8300, "Message": "Invalid state"}]}
+            ]}}
+        return ok_results(method, ids)
+
+    client, _ = make_client(tmp_path, handler)
+    client.suspend_campaigns("a", [1, 2])
+    client.recover_campaigns("a")
+
+    assert client.state_store.load_suspended(["a"])["a"]["campaign_ids"] == [1, 2]
+
+
+def test_recover_marks_recovered_on_success(tmp_path):
+    client, _ = make_client(tmp_path, ok_results)
+    client.suspend_campaigns("a", [1, 2])
+    client.suspend_campaigns("b", [3])
+
+    client.recover_campaigns("a")
+    client.recover_campaigns_many(["b"])
+
+    assert client.state_store.load_suspended(["a", "b"]) == {}
+
+
+def test_bulk_resume_marks_fully_resumed_logins_recovered(tmp_path):
+    def handler(method, ids):
+        if method == "resume" and 5 in ids:
+            return {"result": {"ResumeResults": [
+                {"Errors": [{"Code": 8300, "Message": "Invalid state"}]} if campaign_id == 5
+                else {"Id": campaign_id} for campaign_id in ids
+            ]}}
+        return ok_results(method, ids)
+
+    client, _ = make_client(tmp_path, handler)
+    campaigns = {"a": [1, 2], "b": [3], "c": [4, 5]}
+    client.suspend_campaigns_many(campaigns)
+
+    client.resume_campaigns_many({"a": [1, 2], "b": [3, 6], "c": [4, 5]})
+
+    states = client.state_store.load_suspended(["a", "b", "c"])
+    assert list(states) == ["c"]
+    assert states["c"]["campaign_ids"] == [4, 5]
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from api_lib.files import atomic_write
+
+
+def test_atomic_write_replaces_file(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with atomic_write(str(path)) as f:
+        f.write("new")
+
+    assert path.read_text() == "new"
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_atomic_write_keeps_file_and_removes_tmp_on_error(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with pytest.raises(ValueError):
+        with atomic_write(str(path), "wb") as f:
+            f.write(b"partial")
+            raise ValueError("serialization failed")
+
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["state.json"]
@@ -0,0 +1,56 @@
+import pathlib
+
+import pytest
+
+from api_lib import YandexMessengerBot
+from api_lib.multipart import iter_file_chunks
+
+
+class StubResponse:
+    def json(self):
+        return {"ok": True}
+
+
+class StubSession:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, headers=None, data=None, **kwargs):
+        self.posts.append((url, b"".join(data)))
+        return StubResponse()
+
+
+def make_bot():
+    session = StubSession()
+    return YandexMessengerBot("token", "user@example.com", session=session), session
+
+
+@pytest.mark.parametrize("source", ["reports/daily.csv", "daily.csv", r"C:\reports\daily.csv"])
+def test_missing_path_is_not_sent_as_contents(source):
+    bot, session = make_bot()
+
+    with pytest.raises(FileNotFoundError):
+        bot.send_file(source)
+    with pytest.raises(FileNotFoundError):
+        bot.send_file(source, filename="data.csv", compress="gzip")
+    assert session.posts == []
+
+
+def test_text_is_sent_as_contents():
+    assert b"".join(iter_file_chunks("login,cost\na,1.5\n")) == b"login,cost\na,1.5\n"
+    assert b"".join(iter_file_chunks("1.5")) == b"1.5"
+
+
+def test_filename_defaults_to_path_basename(tmp_path):
+    path = tmp_path / "spent.csv"
+    path.write_text("login,cost\n")
+    bot, session = make_bot()
+
+    bot.send_file(str(path))
+    bot.send_file(pathlib.Path(path))
+    bot.send_file(b"login,cost\n")
+
+    bodies = [body for _, body in session.posts]
+    assert b'filename="spent.csv"' in bodies[0] and b"login,cost\n" in bodies[0]
+    assert b'filename="spent.csv"' in bodies[1]
+    assert b'filename="data.csv"' in bodies[2]
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from api_lib import YandexDirect
+
+REPORTS = {
+    "ADNET_GROUP": "SEARCH\t100.0\nAD_NETWORK\t50.0\n",
+    "ADNET_RU": "30.0\n",
+}
+
+
+class StubResponse:
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.headers = {}
+        self.encoding = None
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class StubSession:
+    """
+    Fails the GeoRegions dictionary and answers two-report reconciliation
+    """
+    def __init__(self):
+        self.report_names = []
+
+    def post(self, url, stream=False, data=None, **kwargs):
+        if "dictionaries" in url:
+            return StubResponse(500, '{"error": {"error_code": 1000}}')
+        name = json.loads(data)["params"]["ReportName"]
+        self.report_names.append(name)
+        suffix = next(suffix for suffix in REPORTS if name.endswith(suffix))
+        return StubResponse(200, REPORTS[suffix])
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_single_report_falls_back_without_geo_regions(vectorized):
+    session = StubSession()
+    client = YandexDirect("token", session=session, vectorized_parsing=vectorized)
+
+    rows = client.get_accounts_reconcile_with_commission({"a": "token"}, single_report=True)
+
+    assert [name.split("_a_")[1] for name in session.report_names] == ["ADNET_GROUP", "ADNET_RU"]
+    assert len(rows) == 1
+    assert rows[0]["search_spend"] == 100.0
+    assert rows[0]["rsy_outside_rf_spend"] == 20.0
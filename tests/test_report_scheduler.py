@@ -0,0 +1,56 @@
+import json
+
+from api_lib import ReportScheduler, YandexDirect
+from api_lib import report_scheduler
+
+
+class StubResponse:
+    def __init__(self, status_code, text=""):
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode("utf-8")
+        # Дольше паузы после сетевой ошибки (2 с), чтобы повтор r1 шел при r2 в очереди
+        self.headers = {"retryIn": "5"}
+        self.encoding = None
+
+
+class StubSession:
+    """
+    Reports API: a report is queued (201) on its first request and ready
+    (200) on the next one. The first request of names in fail_once raises.
+    Tracks how many reports were queued and not returned at once.
+    """
+    def __init__(self, fail_once=()):
+        self.fail_once = set(fail_once)
+        self.offline = set()
+        self.max_offline = 0
+
+    def post(self, url, stream=False, data=None, **kwargs):
+        name = json.loads(data)["params"]["ReportName"]
+        if name in self.fail_once:
+            self.fail_once.discard(name)
+            raise ConnectionError("Connection reset")
+        if name in self.offline:
+            self.offline.discard(name)
+            return StubResponse(200, "1.0\n")
+        self.offline.add(name)
+        self.max_offline = max(self.max_offline, len(self.offline))
+        return StubResponse(201)
+
+
+def body(name):
+    return {"params": {"ReportName": name, "FieldNames": ["Cost"]}}
+
+
+def test_retry_after_network_error_keeps_its_slot(monkeypatch):
+    monkeypatch.setattr(report_scheduler, "sleep", lambda seconds: None)
+    session = StubSession(fail_once=["r1"])
+    scheduler = ReportScheduler(YandexDirect("token", session=session, requests_per_second=0),
+                                max_queued_per_login=1)
+    for name in ("r1", "r2", "r3"):
+        scheduler.add(name, "token", "a", body(name))
+
+    results = scheduler.run()
+
+    assert results == {"r1": "1.0\n", "r2": "1.0\n", "r3": "1.0\n"}
+    assert session.max_offline == 1
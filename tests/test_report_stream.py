@@ -0,0 +1,51 @@
+import pytest
+from requests.exceptions import ChunkedEncodingError
+
+from api_lib import YandexDirect
+
+
+class BrokenStreamResponse:
+    status_code = 200
+    headers = {"RequestId": "1"}
+    content = b""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def iter_lines(self, chunk_size=None, decode_unicode=False):
+        yield from self.lines
+        raise ChunkedEncodingError("Connection broken")
+
+    def close(self):
+        self.closed = True
+
+
+class StubSession:
+    def __init__(self, lines):
+        self.lines = lines
+        self.responses = []
+
+    def post(self, url, stream=False, **kwargs):
+        response = BrokenStreamResponse(self.lines)
+        self.responses.append(response)
+        return response
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_broken_filtered_stream_is_not_summed(vectorized):
+    session = StubSession(["10.5", "20.0"])
+    client = YandexDirect("token", session=session, vectorized_parsing=vectorized)
+
+    result = client.get_single_account_spent_filtered("token", "a", stream=True)
+
+    assert result == {'login': "a", 'cost': 0.0}
+    assert session.responses[0].closed
+
+
+def test_broken_adnetwork_stream_is_not_summed():
+    client = YandexDirect("token", session=StubSession(["SEARCH\t10.5"]))
+
+    result = client.get_single_account_spent_by_adnetwork("token", "a", stream=True)
+
+    assert result == {'login': "a", 'costs': {}}
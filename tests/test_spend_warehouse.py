@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+import pytest
+
+from api_lib import SpendWarehouse, YandexDirect
+
+pytest.importorskip("pyarrow")
+
+
+class StubDirect(YandexDirect):
+    """
+    Answers daily spend reports with 1.0 per day and records requested ranges
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ranges = []
+
+    def _request_report(self, token, login, body, cache_mode=None, **kwargs):
+        criteria = body["params"]["SelectionCriteria"]
+        date_from = date.fromisoformat(criteria["DateFrom"])
+        date_to = date.fromisoformat(criteria["DateTo"])
+        self.ranges.append((date_from, date_to))
+        lines = []
+        while date_from <= date_to:
+            lines.append(f"{date_from}\t1.0")
+            date_from += timedelta(days=1)
+        return "\n".join(lines) + "\n"
+
+
+def make_client(tmp_path):
+    client = StubDirect("token")
+    client._spend_warehouse = SpendWarehouse(client, directory=str(tmp_path), history_days=90)
+    return client
+
+
+def test_range_before_stored_days_is_backfilled(tmp_path):
+    client = make_client(tmp_path)
+    client.get_accounts_spent_incremental({"a": "t"}, "LAST_3_DAYS")
+    client.ranges.clear()
+
+    row, = client.get_accounts_spent_incremental({"a": "t"}, "LAST_365_DAYS")
+
+    assert row["status"] == "ok"
+    assert row["cost"] == 365.0
+    warehouse = client.spend_warehouse
+    yesterday = warehouse._today() - timedelta(days=1)
+    assert client.ranges[0] == (yesterday - timedelta(days=364), yesterday - timedelta(days=90))
+    assert warehouse.synced_from("a") == yesterday - timedelta(days=364)
+
+
+def test_sync_requests_only_new_and_recheck_days(tmp_path):
+    client = make_client(tmp_path)
+    warehouse = client.spend_warehouse
+    warehouse.sync(["a"], until="2026-03-10")
+    client.ranges.clear()
+
+    warehouse.sync(["a"], until="2026-03-15")
+    warehouse.sync(["a"], until="2026-03-15")
+
+    # Последние 3 сохраненных дня запрашиваются заново при каждой синхронизации
+    assert client.ranges == [(date(2026, 3, 8), date(2026, 3, 15)),
+                             (date(2026, 3, 13), date(2026, 3, 15))]
+    assert warehouse.covers("a", "2025-12-11", "2026-03-15")
+    assert not warehouse.covers("a", "2025-12-10", "2026-03-15")
+    assert warehouse.spent("a", "2026-02-25", "2026-03-05") == 9.0